@@ -7,7 +7,7 @@ import re
 import time
 import uuid
 from datetime import datetime, timezone
-from typing import Dict, Optional
+from typing import Any, Dict, Optional
 
 import magic
 import pdfplumber
@@ -45,7 +45,8 @@ class PDFExtractor:
                     cleaned = self._basic_clean(text)
                     page_texts.append(cleaned)
 
-            metadata = self._extract_metadata(file_path, source_url)
+                # Reuse the open document rather than parsing the file again.
+                metadata = self._extract_metadata(file_path, source_url, pdf)
             return {"page_texts": page_texts, "metadata": metadata}
         except Exception as e:
             logger.error(f"Document extraction failed: {str(e)}")
@@ -58,9 +59,23 @@ class PDFExtractor:
         text = re.sub(r"(?<=[a-z])\.(?=[A-Z])", ". ", text)
         return text.strip()
 
-    def _extract_metadata(self, file_path: str, source_url: str) -> Dict:
-        """Extract metadata from PDF."""
+    def _extract_metadata(
+        self, file_path: str, source_url: str, pdf: Optional[Any] = None
+    ) -> Dict:
+        """Extract metadata from PDF.
+
+        When ``pdf`` is an already open pdfplumber document its parsed
+        metadata and page list are used; otherwise the file is read with
+        pypdf.
+        """
         try:
+            if pdf is not None:
+                info = pdf.metadata or {}
+                return {
+                    "title": info.get("Title", os.path.basename(file_path)),
+                    "pageCount": len(pdf.pages),
+                    "sourceUrl": source_url,
+                }
             with open(file_path, "rb") as file:
                 reader = pypdf.PdfReader(file)
                 info = reader.metadata if reader.metadata else {}
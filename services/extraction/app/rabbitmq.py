@@ -6,7 +6,7 @@ import os
 import random
 import time
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Callable, Optional
 
 import pika
@@ -99,10 +99,12 @@ class EventConsumer:
                         time.sleep(wait)
                         continue
 
+                # Naive UTC, in the format consumers have always received.
+                timestamp = datetime.now(timezone.utc).replace(tzinfo=None)
                 message = {
                     "event_type": event_type,
                     "data": event_data,
-                    "timestamp": datetime.utcnow().isoformat(),
+                    "timestamp": timestamp.isoformat(),
                 }
 
                 if not self.channel:
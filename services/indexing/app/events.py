@@ -4,7 +4,7 @@ import logging
 import os
 import uuid
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timezone
 from enum import Enum
 from typing import Dict
 
@@ -205,10 +205,12 @@ def process_extracted_event(message):
             chunk_meta = chunk.get("metadata", {})
             chunk_index = chunk_meta.get("chunk_index", 0)
             chunk_id = f"{document_id}_chunk_{chunk_index}"
+            # Naive UTC, in the format consumers have always received.
+            indexed_at = datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
             indexed_event = {
                 "eventType": "ChunksIndexed",
                 "eventId": str(uuid.uuid4()),
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": indexed_at,
                 "correlationId": correlation_id,
                 "source": "indexing-service",
                 "version": EVENT_VERSION,
@@ -228,7 +230,7 @@ def process_extracted_event(message):
                         "pageCount": chunk_meta.get("pageCount", 0),
                         "sourceUrl": chunk_meta.get("sourceUrl", "Unknown Source"),
                     },
-                    "indexedAt": datetime.utcnow().isoformat(),
+                    "indexedAt": indexed_at,
                 },
             }
             # Log the ChunksIndexed event without chunkText for brevity
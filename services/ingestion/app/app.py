@@ -1,28 +1,35 @@
 """FastAPI application for the MARP ingestion service."""
 
+import asyncio
+import contextlib
 import logging
 import os
 import sys
-import threading
-import time
 import uuid
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 
-import aiofiles  # type: ignore[import-untyped]
+from correlation import (
+    CorrelationIdFilter,
+    CorrelationIdMiddleware,
+    correlation_id_var,
+)
 from discoverer import MARPDocumentDiscoverer
 from events import publish_document_discovered_event
 from fastapi import BackgroundTasks, FastAPI, HTTPException
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.responses import FileResponse, JSONResponse
 from rabbitmq import EventPublisher
 from storage import DocumentStorage
 
 logger = logging.getLogger("ingestion")
 
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+_log_handler = logging.StreamHandler(sys.stdout)
+_log_handler.addFilter(CorrelationIdFilter())
 logging.basicConfig(
     level=getattr(logging, LOG_LEVEL.upper(), logging.INFO),
-    format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
-    stream=sys.stdout,
+    format="%(asctime)s | %(levelname)s | %(name)s | %(correlation_id)s | %(message)s",
+    handlers=[_log_handler],
 )
 
 DATA_DIR = os.environ.get("DATA_DIR", "./data")
@@ -35,14 +42,66 @@ event_publisher = EventPublisher(host=RABBITMQ_HOST)
 storage_dir = DATA_DIR
 document_discoverer = MARPDocumentDiscoverer(storage_dir)
 
-app = FastAPI(title="MARP Ingestion Service", version="1.0.0")
+DISCOVERY_INTERVAL = int(os.getenv("DISCOVERY_INTERVAL", "600"))
+
+
+def _run_discovery_cycle(correlation_id: str) -> None:
+    """Discover documents and publish an event for each new one."""
+    documents = 0
+    for doc in document_discoverer.discover_and_process_documents(correlation_id):
+        publish_document_discovered_event(event_publisher, doc)
+        documents += 1
+    logger.info(
+        "Discovery cycle complete.",
+        extra={
+            "correlation_id": correlation_id,
+            "documents": documents,
+        },
+    )
+
+
+async def _periodic_discovery() -> None:
+    """Run document discovery every DISCOVERY_INTERVAL seconds."""
+    logger.info("Starting periodic document discovery.")
+    while True:
+        correlation_id = str(uuid.uuid4())
+        correlation_id_var.set(correlation_id)
+        try:
+            logger.info("Running document discovery cycle.")
+            await asyncio.to_thread(_run_discovery_cycle, correlation_id)
+        except Exception as e:
+            logger.error(
+                "Periodic discovery error: %s",
+                str(e),
+                extra={"correlation_id": correlation_id},
+            )
+        logger.info(
+            "Sleeping for %d seconds before next discovery cycle.",
+            DISCOVERY_INTERVAL,
+        )
+        await asyncio.sleep(DISCOVERY_INTERVAL)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the periodic discovery task and cancel it on shutdown."""
+    task = asyncio.create_task(_periodic_discovery())
+    yield
+    task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await task
+    await asyncio.to_thread(event_publisher.close)
+
+
+app = FastAPI(title="MARP Ingestion Service", version="1.0.0", lifespan=lifespan)
+app.add_middleware(CorrelationIdMiddleware)
 
 
 @app.get("/documents")
 async def list_documents():
     """List all documents and their metadata."""
     try:
-        documents = storage.list_documents()
+        documents = await asyncio.to_thread(storage.list_documents)
         return {"documents": documents}
     except Exception as e:
         logger.error(f"Listing documents failed: {str(e)}")
@@ -51,44 +110,38 @@ async def list_documents():
 
 @app.get("/documents/{document_id}")
 async def get_document(document_id: str):
-    """Stream a document PDF to the client."""
-    file_path = storage.get_pdf_path(document_id)
+    """Send a document PDF to the client straight from disk."""
+    file_path = await asyncio.to_thread(storage.get_pdf_path, document_id)
     if not file_path or not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail="Document not found")
 
-    async def file_iterator():
-        async with aiofiles.open(file_path, "rb") as f:
-            chunk = await f.read(1024 * 1024)
-            while chunk:
-                yield chunk
-                chunk = await f.read(1024 * 1024)
-
-    return StreamingResponse(
-        file_iterator(),
+    return FileResponse(
+        file_path,
         media_type="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename={document_id}.pdf"},
+        filename=f"{document_id}.pdf",
     )
 
 
 @app.post("/discovery/start")
 async def start_discovery(background_tasks: BackgroundTasks):
     """Trigger document discovery in the background."""
-    correlation_id = str(uuid.uuid4())
+    correlation_id = correlation_id_var.get()
 
     def discovery_job():
         try:
-            new_documents = document_discoverer.discover_and_process_documents(
-                correlation_id
-            )
+            documents = 0
             events_published = 0
-            for doc in new_documents:
+            for doc in document_discoverer.discover_and_process_documents(
+                correlation_id
+            ):
+                documents += 1
                 if publish_document_discovered_event(event_publisher, doc):
                     events_published += 1
             logger.info(
                 "Background discovery completed.",
                 extra={
                     "correlation_id": correlation_id,
-                    "documents": len(new_documents),
+                    "documents": documents,
                     "events_published": events_published,
                 },
             )
@@ -116,11 +169,11 @@ async def home():
 @app.get("/health")
 async def health():
     """Health check endpoint."""
-    rabbitmq_status = (
-        "healthy"
-        if event_publisher and event_publisher._ensure_connection()
-        else "unhealthy"
+    # Connecting to the broker blocks, so keep it off the event loop.
+    connected = bool(event_publisher) and await asyncio.to_thread(
+        event_publisher.is_connected
     )
+    rabbitmq_status = "healthy" if connected else "unhealthy"
     status = {
         "status": "healthy" if rabbitmq_status == "healthy" else "unhealthy",
         "timestamp": datetime.now(timezone.utc).isoformat(),
@@ -130,42 +183,3 @@ async def health():
     return JSONResponse(
         content=status, status_code=200 if rabbitmq_status == "healthy" else 503
     )
-
-
-def run_discovery_background() -> None:
-    """Run periodic document discovery on a background thread."""
-
-    def discovery():
-        logger.info("Starting periodic document discovery.")
-        while True:
-            try:
-                logger.info("Running document discovery cycle.")
-                correlation_id = str(uuid.uuid4())
-                new_documents = document_discoverer.discover_and_process_documents(
-                    correlation_id
-                )
-                for doc in new_documents:
-                    publish_document_discovered_event(event_publisher, doc)
-                logger.info(
-                    "Discovery cycle complete.",
-                    extra={
-                        "correlation_id": correlation_id,
-                        "documents": len(new_documents),
-                    },
-                )
-            except Exception as e:
-                logger.error(
-                    "Periodic discovery error: %s",
-                    str(e),
-                    extra={"correlation_id": correlation_id},
-                )
-            logger.info("Sleeping for 10 minutes before next discovery cycle.")
-            time.sleep(600)
-
-    threading.Thread(target=discovery, daemon=True).start()
-
-
-@app.on_event("startup")
-def start_background_discovery() -> None:
-    """Start the periodic discovery loop on application startup."""
-    run_discovery_background()
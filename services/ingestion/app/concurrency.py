@@ -0,0 +1,89 @@
+"""Adaptive concurrency control for PDF downloads."""
+
+import logging
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger("ingestion.concurrency")
+
+
+class AdaptiveConcurrencyLimiter:
+    """Bound concurrent downloads and tune the bound from observed throughput.
+
+    Completed downloads report their size. Every ``window`` seconds the
+    throughput of the last window is compared with the one before it and
+    the limit takes one step: in the same direction while throughput
+    improves, in the opposite direction once it drops. The limit stays
+    within ``[minimum, maximum]``.
+
+    A window only measures busy time: the first acquire after the limiter
+    went idle starts a fresh one, so the gap between discovery cycles is not
+    read as a throughput collapse. Releases that transferred no bytes (304s,
+    unchanged validators, failures) are not download samples and never
+    close a window.
+    """
+
+    def __init__(
+        self,
+        initial: int = 8,
+        minimum: int = 2,
+        maximum: int = 32,
+        window: float = 3.0,
+    ):
+        if not minimum <= initial <= maximum:
+            raise ValueError("initial must lie between minimum and maximum")
+        self.minimum = minimum
+        self.maximum = maximum
+        self.window = window
+        self._limit = initial
+        self._active = 0
+        self._direction = 1
+        self._window_start = time.monotonic()
+        self._window_bytes = 0
+        self._last_throughput: Optional[float] = None
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        """Current number of downloads allowed to run at once."""
+        return self._limit
+
+    def acquire(self) -> None:
+        """Block until a download slot is free, then take it."""
+        with self._cond:
+            while self._active >= self._limit:
+                self._cond.wait()
+            if self._active == 0:
+                self._window_start = time.monotonic()
+                self._window_bytes = 0
+            self._active += 1
+
+    def release(self, nbytes: int = 0) -> None:
+        """Free a download slot and record how many bytes it transferred."""
+        with self._cond:
+            self._active -= 1
+            if nbytes > 0:
+                self._window_bytes += nbytes
+                now = time.monotonic()
+                if now - self._window_start >= self.window:
+                    self._adjust(now)
+            self._cond.notify_all()
+
+    def _adjust(self, now: float) -> None:
+        """Step the limit according to the sign of the throughput change."""
+        throughput = self._window_bytes / (now - self._window_start)
+        if self._last_throughput is not None and throughput < self._last_throughput:
+            self._direction = -self._direction
+        new_limit = max(self.minimum, min(self.maximum, self._limit + self._direction))
+        if new_limit != self._limit:
+            logger.debug(
+                "Download concurrency %d -> %d (%.2f MB/s).",
+                self._limit,
+                new_limit,
+                throughput / 1_000_000,
+            )
+        self._limit = new_limit
+        self._last_throughput = throughput
+        self._window_start = now
+        self._window_bytes = 0
@@ -0,0 +1,57 @@
+"""Request-scoped correlation IDs for the ingestion service."""
+
+import logging
+import uuid
+from contextvars import ContextVar
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+CORRELATION_HEADER = "X-Correlation-ID"
+_HEADER_KEY = CORRELATION_HEADER.lower().encode("latin-1")
+
+correlation_id_var: ContextVar[str] = ContextVar("correlation_id", default="-")
+
+
+class CorrelationIdFilter(logging.Filter):
+    """Fill in ``record.correlation_id`` from the current context."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "correlation_id", None) is None:
+            record.correlation_id = correlation_id_var.get()
+        return True
+
+
+class CorrelationIdMiddleware:
+    """ASGI middleware that binds a correlation ID to each HTTP request.
+
+    The ID is taken from the ``X-Correlation-ID`` request header or
+    generated, stored in ``correlation_id_var`` for the lifetime of the
+    request (including background tasks), and echoed in the response.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        correlation_id = ""
+        for name, value in scope["headers"]:
+            if name == _HEADER_KEY:
+                correlation_id = value.decode("latin-1")
+                break
+        correlation_id = correlation_id or str(uuid.uuid4())
+        header = (_HEADER_KEY, correlation_id.encode("latin-1"))
+
+        async def send_with_correlation_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), header]
+            await send(message)
+
+        token = correlation_id_var.set(correlation_id)
+        try:
+            await self.app(scope, receive, send_with_correlation_id)
+        finally:
+            correlation_id_var.reset(token)
@@ -1,22 +1,91 @@
 """Document discovery for locating and tracking MARP PDFs."""
 
+import functools
 import hashlib
+import json
 import logging
 import os
+import re
+import time
 import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import List, Optional
+from typing import Dict, Iterator, List, Mapping, Optional, Set
 
 import requests
+from concurrency import AdaptiveConcurrencyLimiter
 from events import DocumentDiscovered
 from extractor import PDFLinkExtractor
+from requests.adapters import HTTPAdapter
 from storage import DocumentStorage
+from urllib3.util.retry import Retry
 
 logger = logging.getLogger("ingestion.discoverer")
 
 EVENT_VERSION = os.getenv("EVENT_VERSION", "1.0")
 DISCOVERY_TIMEOUT = int(os.getenv("DISCOVERY_TIMEOUT", "10"))
 DOWNLOAD_TIMEOUT = int(os.getenv("DOWNLOAD_TIMEOUT", "60"))
+CHECK_STALENESS = int(os.getenv("CHECK_STALENESS", str(6 * 60 * 60)))
+# Worker threads in the discovery pool; also the ceiling for the adaptive
+# download limit and the size of the HTTP connection pool.
+MAX_CONCURRENT_DOWNLOADS = max(1, int(os.getenv("INGEST_WORKERS", "32")))
+INITIAL_CONCURRENT_DOWNLOADS = min(15, MAX_CONCURRENT_DOWNLOADS)
+MIN_CONCURRENT_DOWNLOADS = min(2, MAX_CONCURRENT_DOWNLOADS)
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+HTTP_RETRIES = 3
+HTTP_BACKOFF_FACTOR = 2
+HTTP_BACKOFF_JITTER = 2.0
+INDEX_PAGE_CACHE_FILE = ".index_cache.json"
+# Index entries written before validators were stored verbatim hold a
+# SHA-256 hex digest in ``hash``.
+_LEGACY_HASH_RE = re.compile(r"[0-9a-f]{64}")
+
+
+@functools.lru_cache(maxsize=4096)
+def document_id_for_url(url: str) -> str:
+    """Return the stable document ID for a PDF URL.
+
+    The ID keys the storage index and the chunks indexed downstream, so
+    changing the derivation would orphan every previously indexed document.
+    Results are memoised because the same URLs come back every discovery
+    cycle.
+    """
+    return hashlib.sha256(url.encode()).hexdigest()
+
+
+def _build_session() -> requests.Session:
+    """Create a keep-alive session that retries transient gateway errors.
+
+    Retry delays are jittered so downloads that fail together do not all
+    retry at the same moment. The connection pool is as large as the
+    download pool so worker threads reuse connections instead of opening
+    and discarding them.
+    """
+    retry = Retry(
+        total=HTTP_RETRIES,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        backoff_jitter=HTTP_BACKOFF_JITTER,
+        status_forcelist=[502, 503, 504],
+        allowed_methods=["HEAD", "GET"],
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=16,
+        pool_maxsize=MAX_CONCURRENT_DOWNLOADS,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _content_length(response: requests.Response) -> Optional[int]:
+    """Return the advertised body size, or None if absent or malformed."""
+    try:
+        return int(response.headers["content-length"])
+    except (KeyError, TypeError, ValueError):
+        return None
 
 
 class MARPDocumentDiscoverer:
@@ -32,181 +101,349 @@ class MARPDocumentDiscoverer:
     def __init__(self, storage_dir: str = "/data"):
         self.storage = DocumentStorage(storage_dir)
         self.extractor = PDFLinkExtractor(self.BASE_URL)
+        self.session = _build_session()
+        self.index_cache_path = os.path.join(storage_dir, INDEX_PAGE_CACHE_FILE)
+        self.download_limiter = AdaptiveConcurrencyLimiter(
+            initial=INITIAL_CONCURRENT_DOWNLOADS,
+            minimum=MIN_CONCURRENT_DOWNLOADS,
+            maximum=MAX_CONCURRENT_DOWNLOADS,
+        )
         logger.info("Document discoverer initialized.", extra={"correlation_id": None})
 
-    def _get_document_hash(self, url: str, correlation_id: Optional[str] = None) -> str:
-        """Compute a content hash using headers to detect changes."""
-        try:
-            response = requests.head(
-                url, allow_redirects=True, timeout=DISCOVERY_TIMEOUT
-            )
-            response.raise_for_status()
+    @staticmethod
+    def _hash_from_headers(headers: Mapping[str, str]) -> str:
+        """Return the document's strongest validator for change detection.
 
-            title = url.split("/")[-1].split(".")[0]
-            last_modified = response.headers.get("last-modified")
-            if last_modified:
-                hash_input = f"{title}-{last_modified}"
-            else:
-                etag = response.headers.get("etag")
-                if etag:
-                    hash_input = f"{title}-{etag}"
-                else:
-                    content_length = response.headers.get("content-length", "")
-                    hash_input = f"{title}-{content_length}"
-
-            return hashlib.sha256(hash_input.encode()).hexdigest()
-        except requests.RequestException as e:
-            logger.error(
-                f"Failed to compute document hash for {url}: {str(e)}",
-                extra={"correlation_id": correlation_id},
-            )
-            return ""
+        The value is only ever compared for equality, so it is stored as is
+        under the index's ``hash`` key rather than digested.
+        """
+        return (
+            headers.get("etag")
+            or headers.get("last-modified")
+            or headers.get("content-length", "")
+        )
 
     def discover_document_urls(self, correlation_id: Optional[str] = None) -> List[str]:
-        """Fetch the MARP page and extract PDF URLs."""
+        """Fetch the MARP page and extract PDF URLs.
+
+        The page's ETag and the URLs found on it are cached; when the page
+        has not changed the cached URLs are returned without parsing.
+        """
+        cache = self._load_index_page_cache()
+        cached_etag = cache.get("etag")
         try:
-            logger.info(
-                f"Fetching content from {self.BASE_URL}.",
-                extra={"correlation_id": correlation_id},
+            response = self.session.get(
+                self.BASE_URL,
+                headers={"If-None-Match": cached_etag} if cached_etag else None,
+                timeout=DOWNLOAD_TIMEOUT,
             )
-            response = requests.get(self.BASE_URL, timeout=DOWNLOAD_TIMEOUT)
+            if response.status_code == 304 and "urls" in cache:
+                logger.debug(
+                    "MARP page not modified; reusing %d cached URLs.",
+                    len(cache["urls"]),
+                    extra={"correlation_id": correlation_id},
+                )
+                return list(cache["urls"])
             response.raise_for_status()
-
-            logger.info(
-                f"Response status: {response.status_code}",
-                extra={"correlation_id": correlation_id},
-            )
-            logger.info(
-                f"Content length: {len(response.text)}",
-                extra={"correlation_id": correlation_id},
-            )
-            logger.info("Content fetched.", extra={"correlation_id": correlation_id})
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Fetched %s (status %s, %d characters).",
+                    self.BASE_URL,
+                    response.status_code,
+                    len(response.text),
+                    extra={"correlation_id": correlation_id},
+                )
 
             pdf_urls: List[str] = self.extractor.get_pdf_urls(response.text)
+            etag = response.headers.get("etag")
+            if etag:
+                self._save_index_page_cache({"etag": etag, "urls": pdf_urls})
             return pdf_urls
 
         except requests.RequestException as e:
             logger.error(
-                f"Document discovery failed: {str(e)}",
+                "Document discovery failed: %s",
+                e,
                 extra={"correlation_id": correlation_id},
             )
             return []
 
+    def _load_index_page_cache(self) -> Dict:
+        """Load the cached ETag and URLs of the MARP page, if any."""
+        try:
+            with open(self.index_cache_path, "r") as f:
+                cache: Dict = json.load(f)
+                return cache
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index_page_cache(self, cache: Dict) -> None:
+        """Persist the MARP page cache; failures only cost a re-parse."""
+        tmp_path = f"{self.index_cache_path}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(cache, f)
+            os.replace(tmp_path, self.index_cache_path)
+        except OSError as e:
+            logger.warning("Could not write MARP page cache: %s", e)
+
     def process_documents(
         self, urls: List[str], correlation_id: str
-    ) -> List[DocumentDiscovered]:
-        """Download PDFs and prepare document discovery events."""
+    ) -> Iterator[DocumentDiscovered]:
+        """Download PDFs and yield document discovery events.
+
+        URLs are independent, so they are checked and downloaded on a
+        thread pool; ``download_limiter`` caps how many downloads run at
+        once. URLs without a stored PDF are submitted first because they
+        always need a full download. Events are yielded in the order of
+        ``urls`` as soon as each is ready, so callers can publish while
+        later PDFs are still downloading. Index updates are kept in memory
+        and written once when the generator finishes or is closed. Repeated
+        URLs are processed once, and stored PDFs checked within
+        ``CHECK_STALENESS`` seconds are not submitted at all.
+        """
+        urls = list(dict.fromkeys(urls))
         logger.info(
-            f"Processing {len(urls)} documents.",
+            "Processing %d documents.",
+            len(urls),
             extra={"correlation_id": correlation_id},
         )
-        discovered_docs: List[DocumentDiscovered] = []
-
-        for url in urls:
-            logger.info(
-                f"Processing URL: {url}", extra={"correlation_id": correlation_id}
+        existing_ids = self.storage.existing_pdf_ids()
+        doc_ids = [document_id_for_url(url) for url in urls]
+        held = [
+            doc_id in existing_ids and doc_id in self.storage.index
+            for doc_id in doc_ids
+        ]
+        pending = [
+            i
+            for i in range(len(urls))
+            if not (held[i] and self._checked_recently(doc_ids[i]))
+        ]
+        if len(pending) < len(urls):
+            logger.debug(
+                "Skipping %d documents checked recently.",
+                len(urls) - len(pending),
+                extra={"correlation_id": correlation_id},
             )
-            current_hash = self._get_document_hash(url, correlation_id)
-            if not current_hash:
+
+        produced = 0
+        try:
+            with ThreadPoolExecutor(
+                max_workers=MAX_CONCURRENT_DOWNLOADS,
+                thread_name_prefix="discovery",
+            ) as executor:
+                futures: Dict[int, Future[Optional[DocumentDiscovered]]] = {}
+                for i in sorted(pending, key=held.__getitem__):
+                    futures[i] = executor.submit(
+                        self._process_url,
+                        urls[i],
+                        doc_ids[i],
+                        correlation_id,
+                        existing_ids,
+                    )
+                for i in pending:
+                    event = futures[i].result()
+                    if event is not None:
+                        produced += 1
+                        yield event
+        finally:
+            try:
+                self.storage.flush_index()
+            except OSError as e:
                 logger.error(
-                    f"Hash computation failed for {url}",
+                    "Failed to persist document index: %s",
+                    e,
                     extra={"correlation_id": correlation_id},
                 )
-                continue
             logger.info(
-                f"Hash computed: {current_hash}",
+                "Processed %d documents: %d new or updated.",
+                len(urls),
+                produced,
                 extra={"correlation_id": correlation_id},
             )
 
-            doc_id = hashlib.sha256(url.encode()).hexdigest()
-            pdf_path = os.path.join(
-                self.storage.base_path, "documents", "pdfs", f"{doc_id}.pdf"
-            )
-            file_missing = not os.path.exists(pdf_path)
-            is_new_or_updated = (
-                doc_id not in self.storage.index
-                or self.storage.index[doc_id].get("hash") != current_hash
-                or file_missing
-            )
+    def _process_url(
+        self, url: str, doc_id: str, correlation_id: str, existing_ids: Set[str]
+    ) -> Optional[DocumentDiscovered]:
+        """Download a single PDF if it is new or changed and build its event.
 
-            if is_new_or_updated:
-                if file_missing:
-                    logger.info(
-                        "PDF missing; re-downloading.",
-                        extra={"correlation_id": correlation_id},
-                    )
-                else:
-                    logger.info(
-                        "Document is new or updated.",
-                        extra={"correlation_id": correlation_id},
-                    )
+        Every URL costs at most one GET. For PDFs already on disk the GET
+        carries their stored validators, and a 304 or a response
+        whose validators still match ends the request before the body is
+        read. An updated PDF whose bytes match the stored copy produces no
+        event, so header-only changes do not trigger re-indexing.
+        """
+        file_missing = doc_id not in existing_ids
+        entry = self.storage.index.get(doc_id)
+        conditional: Dict[str, str] = {}
+        previous_content = None
+        if entry is None:
+            reason = "new"
+        elif file_missing:
+            reason = "missing"
+        else:
+            reason = "updated"
+            previous_content = entry.get("content_hash")
+            if entry.get("etag"):
+                conditional["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                conditional["If-Modified-Since"] = entry["last_modified"]
 
-                try:
-                    response = requests.get(url, timeout=60)
-                    response.raise_for_status()
-                    pdf_content = response.content
-                except Exception as e:
-                    logger.error(
-                        f"PDF download failed for {url}: {e}",
-                        extra={"correlation_id": correlation_id},
-                    )
-                    continue
+        now_iso = datetime.now(timezone.utc).isoformat()
+        downloaded = 0
 
-                logger.info(
-                    f"PDF downloaded: {len(pdf_content)} bytes.",
-                    extra={"correlation_id": correlation_id},
-                )
+        def counted_chunks(response: requests.Response) -> Iterator[bytes]:
+            nonlocal downloaded
+            for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                downloaded += len(chunk)
+                yield chunk
 
-                stored = self.storage.store_document(
+        self.download_limiter.acquire()
+        try:
+            response = self.session.get(
+                url,
+                headers=conditional or None,
+                stream=True,
+                timeout=DOWNLOAD_TIMEOUT,
+            )
+            try:
+                if response.status_code == 304:
+                    # Pick up the validator from the 304 so migrated entries
+                    # stop being re-checked on every cycle.
+                    self._mark_checked(
+                        doc_id, self._hash_from_headers(response.headers)
+                    )
+                    logger.debug(
+                        "Server reports %s not modified; skipping.",
+                        url,
+                        extra={"correlation_id": correlation_id},
+                    )
+                    return None
+                response.raise_for_status()
+                validators = response.headers
+                current_hash = self._hash_from_headers(validators)
+                if reason == "updated" and entry is not None:
+                    etag = validators.get("etag")
+                    if (etag and etag == entry.get("etag")) or (
+                        current_hash == entry.get("hash")
+                    ):
+                        # The origin ignored the conditional headers; stop
+                        # before reading the body.
+                        self._mark_checked(doc_id)
+                        logger.debug(
+                            "Unchanged: %s",
+                            url,
+                            extra={"correlation_id": correlation_id},
+                        )
+                        return None
+                if reason == "updated" and previous_content is None:
+                    # Entries from before content_hash was recorded: hash the
+                    # PDF on disk so an unchanged body still produces no event.
+                    previous_content = self.storage.pdf_content_hash(doc_id)
+                stored = self.storage.store_document_stream(
                     document_id=doc_id,
-                    pdf_content=pdf_content,
+                    chunks=counted_chunks(response),
                     metadata={
                         "url": url,
                         "document_id": doc_id,
                         "hash": current_hash,
-                        "date": datetime.now(timezone.utc).isoformat(),
+                        "date": now_iso,
                         "correlation_id": correlation_id,
+                        "etag": validators.get("etag"),
+                        "last_modified": validators.get("last-modified"),
+                        "checked_at": time.time(),
                     },
+                    expected_size=_content_length(response),
+                    persist_index=False,
                 )
-                if not stored:
-                    logger.error(
-                        "Document storage failed.",
-                        extra={"correlation_id": correlation_id},
-                    )
-                    continue
+            finally:
+                response.close()
+        except Exception as e:
+            logger.error(
+                "PDF download failed for %s: %s",
+                url,
+                e,
+                extra={"correlation_id": correlation_id},
+            )
+            return None
+        finally:
+            self.download_limiter.release(downloaded)
 
-                logger.info(
-                    f"Document stored: {doc_id}",
-                    extra={"correlation_id": correlation_id},
-                )
+        if not stored:
+            logger.error(
+                "Document storage failed for %s.",
+                url,
+                extra={"correlation_id": correlation_id},
+            )
+            return None
+        existing_ids.add(doc_id)
+        content_hash = self.storage.index.get(doc_id, {}).get("content_hash")
+        if previous_content and content_hash == previous_content:
+            logger.debug(
+                "Content of %s unchanged despite new headers; no event.",
+                url,
+                extra={"correlation_id": correlation_id},
+            )
+            return None
 
-                event = DocumentDiscovered(
-                    eventType="DocumentDiscovered",
-                    eventId=str(uuid.uuid4()),
-                    timestamp=datetime.now(timezone.utc).isoformat(),
-                    correlationId=correlation_id,
-                    source="ingestion-service",
-                    version=EVENT_VERSION,
-                    payload={
-                        "documentId": doc_id,
-                        "sourceUrl": url,
-                        "filePath": os.path.join(
-                            "/data", "documents", "pdfs", f"{doc_id}.pdf"
-                        ),
-                        "discoveredAt": datetime.now(timezone.utc).isoformat(),
-                    },
-                )
-                discovered_docs.append(event)
-                logger.info(
-                    "Document discovery event created.",
-                    extra={"correlation_id": correlation_id},
-                )
+        event = DocumentDiscovered(
+            eventType="DocumentDiscovered",
+            eventId=str(uuid.uuid4()),
+            timestamp=now_iso,
+            correlationId=correlation_id,
+            source="ingestion-service",
+            version=EVENT_VERSION,
+            payload={
+                "documentId": doc_id,
+                "sourceUrl": url,
+                "filePath": self.storage.pdf_path_for(doc_id),
+                "discoveredAt": now_iso,
+            },
+        )
+        logger.info(
+            "Stored %s document %s (%d bytes) from %s.",
+            reason,
+            doc_id,
+            downloaded,
+            url,
+            extra={
+                "correlation_id": correlation_id,
+                "document_id": doc_id,
+                "source_url": url,
+                "bytes": downloaded,
+                "reason": reason,
+            },
+        )
+        return event
+
+    def _checked_recently(self, doc_id: str) -> bool:
+        """Return whether a stored PDF was confirmed unchanged recently enough.
+
+        Entries without ``checked_at`` fall back to the PDF's modification
+        time, which is when it was last written. Entries still holding a
+        legacy SHA-256 hash always need a re-check.
+        """
+        entry = self.storage.index[doc_id]
+        if _LEGACY_HASH_RE.fullmatch(entry.get("hash") or ""):
+            return False
+        checked_at = entry.get("checked_at")
+        if checked_at is None:
+            try:
+                checked_at = os.stat(self.storage.pdf_path_for(doc_id)).st_mtime
+            except OSError:
+                return False
+        return bool(time.time() - checked_at < CHECK_STALENESS)
 
-        return discovered_docs
+    def _mark_checked(self, doc_id: str, validator: str = "") -> None:
+        """Record that a stored PDF was just confirmed unchanged."""
+        fields: Dict[str, object] = {"checked_at": time.time()}
+        if validator:
+            fields["hash"] = validator
+        self.storage.update_document(doc_id, fields, persist_index=False)
 
     def discover_and_process_documents(
         self, correlation_id: str
-    ) -> List[DocumentDiscovered]:
-        """Run discovery and processing end-to-end."""
+    ) -> Iterator[DocumentDiscovered]:
+        """Run discovery and processing end-to-end, yielding events."""
         urls = self.discover_document_urls(correlation_id)
-        return self.process_documents(urls, correlation_id)
+        yield from self.process_documents(urls, correlation_id)
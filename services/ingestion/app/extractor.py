@@ -1,47 +1,103 @@
 """PDF link extraction for MARP documents."""
 
+import html
 import logging
+import os
+import re
 from typing import List, Optional
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlsplit
 
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 
 logger = logging.getLogger("ingestion.extractor")
 
+# "regex" scans the raw markup for anchor hrefs without building a tree;
+# "bs4" parses the page properly and is kept as a fallback for markup the
+# pattern below does not understand.
+LINK_PARSER = os.getenv("LINK_PARSER", "regex")
+
+# Only anchors with an href are built into the tree; everything else on the
+# page is discarded by the parser.
+_ANCHORS_WITH_HREF = SoupStrainer("a", href=True)
+# A path ending in .pdf, optionally followed by a query or fragment.
+_PDF_LINK_SELECTOR = 'a[href$=".pdf" i], a[href*=".pdf?" i], a[href*=".pdf#" i]'
+
 
 class PDFLinkExtractor:
     """Extract PDF links from HTML content."""
 
-    def __init__(self, base_url: str):
+    # Quoted attribute values are skipped whole, so a ">" or "href" inside
+    # one is never mistaken for the end of the tag or the href attribute.
+    _PDF_HREF_RE = re.compile(
+        r"""<a\s(?:[^>"']|"[^"]*"|'[^']*')*?(?<![\w-])href\s*=\s*"""
+        r"""(?:"([^"]*\.pdf(?:[?#][^"]*)?)"|'([^']*\.pdf(?:[?#][^']*)?)'"""
+        r"""|([^\s"'>]*\.pdf(?:[?#][^\s"'>]*)?)(?=[\s>]))""",
+        re.IGNORECASE,
+    )
+    _COMMENT_RE = re.compile(r"<!--.*?-->", re.DOTALL)
+
+    def __init__(self, base_url: str, parser: str = LINK_PARSER):
         self.base_url = base_url
+        self.parser = parser
+        base = urlsplit(base_url)
+        self._origin = f"{base.scheme}://{base.netloc}"
 
     def get_pdf_urls(
         self, html_content: str, correlation_id: Optional[str] = None
     ) -> List[str]:
-        """Extract PDF URLs from HTML content."""
-        soup = BeautifulSoup(html_content, "lxml")
-        pdf_urls: List[str] = []
-
+        """Extract PDF URLs from HTML content, each listed once in page order."""
         logger.info(
             "Scanning HTML content for PDF links.",
             extra={"correlation_id": correlation_id},
         )
 
-        for link in soup.find_all("a"):
-            href = link.get("href")
-            if not href or not isinstance(href, str):
-                continue
-
-            url: str = urljoin(self.base_url, href)
+        if self.parser == "bs4":
+            hrefs = self._scan_with_bs4(html_content)
+        else:
+            hrefs = self._scan_with_regex(html_content)
 
-            if url.lower().endswith(".pdf"):
-                logger.info(
-                    f"PDF link found: {url}", extra={"correlation_id": correlation_id}
+        # The same document is often linked from several sections.
+        # Fragments never reach the server, so "doc.pdf#page=2" is "doc.pdf".
+        pdf_urls: List[str] = list(
+            dict.fromkeys(self._resolve(href.partition("#")[0]) for href in hrefs)
+        )
+        if logger.isEnabledFor(logging.DEBUG):
+            for url in pdf_urls:
+                logger.debug(
+                    "PDF link found: %s", url, extra={"correlation_id": correlation_id}
                 )
-                pdf_urls.append(url)
 
         logger.info(
-            f"PDF links found: {len(pdf_urls)}",
+            "PDF links found: %d",
+            len(pdf_urls),
             extra={"correlation_id": correlation_id},
         )
         return pdf_urls
+
+    def _resolve(self, href: str) -> str:
+        """Make an href absolute, skipping ``urljoin`` for the common shapes.
+
+        Absolute and site-relative hrefs without dot segments resolve with
+        plain string operations; anything else goes through ``urljoin``.
+        """
+        if "/." not in href:
+            if href.startswith(("https://", "http://")):
+                return href
+            if href.startswith("/") and not href.startswith("//"):
+                return self._origin + href
+        return urljoin(self.base_url, href)
+
+    def _scan_with_regex(self, html_content: str) -> List[str]:
+        """Return the hrefs of PDF anchors outside HTML comments."""
+        return [
+            html.unescape(next(group for group in match.groups() if group).strip())
+            for match in self._PDF_HREF_RE.finditer(
+                self._COMMENT_RE.sub("", html_content)
+            )
+        ]
+
+    @staticmethod
+    def _scan_with_bs4(html_content: str) -> List[str]:
+        """Return the hrefs of PDF anchors from a parsed anchor tree."""
+        soup = BeautifulSoup(html_content, "lxml", parse_only=_ANCHORS_WITH_HREF)
+        return [link["href"] for link in soup.select(_PDF_LINK_SELECTOR)]
@@ -1,43 +1,55 @@
 """RabbitMQ event publisher for the ingestion service with retry logic."""
 
-import json
 import logging
 import os
 import secrets
-from typing import Optional
+import threading
+import time
+from typing import Optional, Sequence, Tuple
 
+import orjson
 import pika
 from events import DocumentDiscovered, EventTypes
 from pika.exceptions import AMQPChannelError, AMQPConnectionError, AMQPError
 
 logger = logging.getLogger("ingestion.rabbitmq")
 
+_random = secrets.SystemRandom()
+
 MAX_RETRIES = int(os.getenv("RABBITMQ_MAX_RETRIES", "5"))
 INITIAL_RETRY_DELAY = int(os.getenv("RABBITMQ_INITIAL_RETRY_DELAY", "1"))
 MAX_RETRY_DELAY = int(os.getenv("RABBITMQ_MAX_RETRY_DELAY", "30"))
-JITTER_RANGE = 0.1
 CONNECTION_TIMEOUT = int(os.getenv("RABBITMQ_CONNECTION_TIMEOUT", "30"))
 EXCHANGE_NAME = "document_events"
+# An open connection that serviced its I/O this recently is trusted as is.
+PUMP_INTERVAL = 0.25
 
 
 class EventPublisher:
-    """Publish events to RabbitMQ with reconnection and retries."""
+    """Publish events to RabbitMQ with reconnection and retries.
+
+    The connection is opened on first use, so constructing a publisher never
+    blocks on the broker. One instance is meant to be shared per process;
+    calls from different threads take turns on its single connection.
+    """
 
     def __init__(self, host: str = "localhost"):
         self.host = host
         self.connection: Optional[pika.BlockingConnection] = None
         self.channel: Optional[pika.channel.Channel] = None
-        try:
-            self._connect()
-        except AMQPError as e:
-            logger.error(f"Initial connection failed: {str(e)}")
+        # pika connections are not thread-safe; discovery runs and health
+        # checks reach the publisher from different worker threads.
+        self._lock = threading.RLock()
+        self._last_pump = 0.0
 
     def _calculate_retry_delay(self, attempt: int) -> float:
-        """Calculate delay with exponential backoff and jitter."""
-        delay: float = min(INITIAL_RETRY_DELAY * (2**attempt), MAX_RETRY_DELAY)
-        jitter = delay * JITTER_RANGE
-        delay += (secrets.randbelow(int(jitter * 2 * 1000)) / 1000.0) - jitter
-        return max(0.0, delay)
+        """Calculate delay with exponential backoff and full jitter.
+
+        The wait is drawn uniformly from zero up to the capped exponential,
+        so publishers that failed together do not retry together.
+        """
+        ceiling = min(INITIAL_RETRY_DELAY * (2**attempt), MAX_RETRY_DELAY)
+        return _random.uniform(0, ceiling)
 
     def _connect(self) -> bool:
         """Establish connection to RabbitMQ and set up the exchange."""
@@ -81,8 +93,89 @@ class EventPublisher:
         correlation_id: Optional[str] = None,
     ) -> bool:
         """Publish an event to RabbitMQ with retry logic."""
-        final_correlation_id = correlation_id or event.correlationId
+        return self.publish_events_batch([(event_type, event, correlation_id)]) == 1
 
+    def publish_events_batch(
+        self,
+        items: Sequence[Tuple[EventTypes, DocumentDiscovered, Optional[str]]],
+    ) -> int:
+        """Publish events back to back and return how many were published.
+
+        Every body is serialised before the first publish and the connection
+        is checked once per attempt rather than once per event. After a
+        failure only the events not yet published are retried.
+        """
+        messages = [
+            self._encode(event_type, event, correlation_id)
+            for event_type, event, correlation_id in items
+        ]
+        with self._lock:
+            published = 0
+
+            for attempt in range(MAX_RETRIES):
+                try:
+                    if not self._ensure_connection():
+                        continue
+
+                    if not self.channel:
+                        raise RuntimeError("Channel not initialized")
+
+                    while published < len(messages):
+                        routing_key, body, properties = messages[published]
+                        self.channel.basic_publish(
+                            exchange=EXCHANGE_NAME,
+                            routing_key=routing_key,
+                            body=body,
+                            properties=properties,
+                        )
+                        published += 1
+                        logger.info(
+                            "Event published.",
+                            extra={
+                                "correlation_id": properties.correlation_id,
+                                "event_type": routing_key,
+                                "routing_key": routing_key,
+                            },
+                        )
+                    return published
+
+                except (AMQPConnectionError, AMQPChannelError) as e:
+                    routing_key, _, properties = messages[published]
+                    if attempt < MAX_RETRIES - 1:
+                        wait_time = self._calculate_retry_delay(attempt)
+                        logger.warning(
+                            f"Publish attempt {attempt + 1}/{MAX_RETRIES} "
+                            f"failed. Retrying in {wait_time:.2f}s: {str(e)}",
+                            extra={
+                                "correlation_id": properties.correlation_id,
+                                "event_type": routing_key,
+                                "attempt": attempt + 1,
+                                "wait_time": wait_time,
+                                "error": str(e),
+                            },
+                        )
+                        self._sleep(wait_time)
+                    else:
+                        logger.error(
+                            f"Publish failed after {MAX_RETRIES} attempts.",
+                            extra={
+                                "correlation_id": properties.correlation_id,
+                                "event_type": routing_key,
+                                "error": str(e),
+                                "total_attempts": MAX_RETRIES,
+                            },
+                        )
+
+            return published
+
+    @staticmethod
+    def _encode(
+        event_type: EventTypes,
+        event: DocumentDiscovered,
+        correlation_id: Optional[str],
+    ) -> Tuple[str, bytes, pika.BasicProperties]:
+        """Build the routing key, body and properties for one event."""
+        final_correlation_id = correlation_id or event.correlationId
         event_data = {
             "eventType": event.eventType,
             "eventId": event.eventId,
@@ -92,96 +185,65 @@ class EventPublisher:
             "version": event.version,
             "payload": event.payload,
         }
-
-        for attempt in range(MAX_RETRIES):
+        properties = pika.BasicProperties(
+            correlation_id=final_correlation_id,
+            delivery_mode=2,
+            content_type="application/json",
+        )
+        return event_type.value, orjson.dumps(event_data), properties
+
+    def _sleep(self, seconds: float) -> None:
+        """Wait between retries, servicing heartbeats while still connected."""
+        if self.connection and self.connection.is_open:
             try:
-                if not self._ensure_connection():
-                    continue
-
-                if not self.channel:
-                    raise RuntimeError("Channel not initialized")
-
-                self.channel.basic_publish(
-                    exchange=EXCHANGE_NAME,
-                    routing_key=event_type.value,
-                    body=json.dumps(event_data),
-                    properties=pika.BasicProperties(
-                        correlation_id=final_correlation_id,
-                        delivery_mode=2,
-                        content_type="application/json",
-                    ),
-                )
-                logger.info(
-                    "Event published.",
-                    extra={
-                        "correlation_id": final_correlation_id,
-                        "event_type": event_type.value,
-                        "routing_key": event_type.value,
-                    },
-                )
-                return True
-
-            except (AMQPConnectionError, AMQPChannelError) as e:
-                if attempt < MAX_RETRIES - 1:
-                    wait_time = self._calculate_retry_delay(attempt)
-                    logger.warning(
-                        f"Publish attempt {attempt + 1}/{MAX_RETRIES} "
-                        f"failed. Retrying in {wait_time:.2f}s: {str(e)}",
-                        extra={
-                            "correlation_id": final_correlation_id,
-                            "event_type": event_type.value,
-                            "attempt": attempt + 1,
-                            "wait_time": wait_time,
-                            "error": str(e),
-                        },
-                    )
-                else:
-                    logger.error(
-                        f"Publish failed after {MAX_RETRIES} attempts.",
-                        extra={
-                            "correlation_id": final_correlation_id,
-                            "event_type": event_type.value,
-                            "error": str(e),
-                            "total_attempts": MAX_RETRIES,
-                        },
-                    )
-                    return False
-
-        return False
+                self.connection.sleep(seconds)
+                return
+            except AMQPError:
+                # The connection died mid-wait; the next attempt reconnects.
+                pass
+        time.sleep(seconds)
 
     def _ensure_connection(self) -> bool:
         """Ensure the connection to RabbitMQ is active or re-establish it."""
+        with self._lock:
+            try:
+                if self.connection and not self.connection.is_closed:
+                    now = time.monotonic()
+                    if now - self._last_pump >= PUMP_INTERVAL:
+                        self.connection.process_data_events()
+                        self._last_pump = now
+                    return True
+                return self._connect()
+            except (AMQPError, OSError) as e:
+                logger.error(f"Connection check failed: {str(e)}")
+                self.connection = None
+                self.channel = None
+                return self._connect()
+
+    def is_connected(self) -> bool:
+        """Report broker connectivity without queueing behind a publish.
+
+        A publish holds the lock through its retries and backoff, which can
+        take longer than a health check may. While it does, the connection's
+        open flag is reported as is; otherwise the connection is checked and
+        re-established as usual.
+        """
+        if not self._lock.acquire(blocking=False):
+            connection = self.connection
+            return connection is not None and connection.is_open
         try:
-            if self.connection and not self.connection.is_closed:
-                self.connection.process_data_events()
-                return True
-            return self._connect()
-        except (AMQPError, OSError) as e:
-            logger.error(f"Connection check failed: {str(e)}")
-            self.connection = None
-            self.channel = None
-            return self._connect()
+            return self._ensure_connection()
+        finally:
+            self._lock.release()
 
     def close(self) -> None:
         """Close the connection to RabbitMQ."""
-        if self.connection and not self.connection.is_closed:
-            try:
-                self.connection.close()
-                logger.info("RabbitMQ connection closed.")
-            except AMQPError as e:
-                logger.error(f"Error closing RabbitMQ connection: {str(e)}")
-        self.connection = None
-        self.channel = None
-
-
-def get_connection(
-    max_retries: int = 5, retry_delay: Optional[int] = None
-) -> Optional[pika.BlockingConnection]:
-    """Get RabbitMQ connection with retries."""
-    if retry_delay is None:
-        retry_delay = secrets.randbelow(5) + 1
-    return None
-
-
-def consume_messages(queue: str, callback, max_retries: Optional[int] = None):
-    pass
+        with self._lock:
+            if self.connection and not self.connection.is_closed:
+                try:
+                    self.connection.close()
+                    logger.info("RabbitMQ connection closed.")
+                except AMQPError as e:
+                    logger.error(f"Error closing RabbitMQ connection: {str(e)}")
+            self.connection = None
+            self.channel = None
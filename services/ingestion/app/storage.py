@@ -1,27 +1,90 @@
 """Document storage management for the ingestion service."""
 
-import json
+import contextlib
+import hashlib
 import logging
 import os
 import threading
-from typing import Dict, List, Optional
+import uuid
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import orjson
 
 logger = logging.getLogger("ingestion.storage")
 
+# Sync each PDF to disk before it replaces the stored copy and is indexed.
+# This costs one synchronous flush per downloaded document; without it a
+# crash shortly after a store can leave an indexed PDF whose data never
+# reached the disk.
+SYNC_PDFS = os.getenv("SYNC_PDFS", "false").lower() == "true"
+
+
+def _preallocate(fd: int, size: int) -> None:
+    """Reserve disk space up front so the PDF is written in few extents."""
+    if size <= 0 or not hasattr(os, "posix_fallocate"):
+        return
+    try:
+        os.posix_fallocate(fd, 0, size)
+    except OSError as e:
+        logger.debug(f"Preallocation not supported: {e}")
+
+
+def _drop_page_cache(fd: int) -> None:
+    """Evict a written file from the page cache.
+
+    Stored PDFs are rarely read back by this service, so keeping them
+    cached only crowds out pages other services could use.
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    except OSError as e:
+        logger.debug(f"Page cache eviction not supported: {e}")
+
 
 class DocumentStorage:
-    """Manage storage of PDFs and a document index."""
+    """Manage storage of PDFs and a document index.
+
+    Writers hold ``_lock``; readers only take it while reloading the index.
+    Their single dict lookups are atomic, and ``list_documents`` iterates
+    over a copy, so a concurrent store never changes an index mid-read.
+    """
 
     def __init__(self, base_path: str = "/data"):
         self._lock = threading.RLock()
+        self._index_stamp: Optional[Tuple[int, int, int]] = None
         self.base_path = base_path
         documents_path = os.path.join(base_path, "documents")
         os.makedirs(documents_path, exist_ok=True)
         self.pdfs_path = os.path.join(documents_path, "pdfs")
         self.index_path = os.path.join(documents_path, "discovered_docs.json")
         os.makedirs(self.pdfs_path, exist_ok=True)
+        self._pdfs_abspath = os.path.abspath(self.pdfs_path)
+        # Index entries record PDF paths relative to base_path.
+        self._pdfs_relpath = os.path.relpath(self.pdfs_path, base_path)
         self._load_index()
 
+    def pdf_path_for(self, document_id: str) -> str:
+        """Return the absolute path a document's PDF is stored at.
+
+        Event consumers read PDFs from the shared volume, so this follows
+        ``base_path`` rather than assuming ``/data``.
+        """
+        return os.path.join(self._pdfs_abspath, f"{document_id}.pdf")
+
+    def pdf_content_hash(self, document_id: str) -> Optional[str]:
+        """Return the ``content_hash`` a stored PDF's bytes would be given.
+
+        Used for entries written before ``content_hash`` was recorded.
+        """
+        try:
+            with open(self.pdf_path_for(document_id), "rb") as f:
+                digest = hashlib.file_digest(f, lambda: hashlib.blake2b(digest_size=16))
+        except OSError:
+            return None
+        return digest.hexdigest()
+
     def get_document_path(self, document_id: str) -> Optional[str]:
         """Return the absolute path to the PDF for a document, or None if not found."""
         self._load_index()
@@ -31,84 +94,195 @@ class DocumentStorage:
         pdf_path = os.path.join(self.base_path, entry["pdf"])
         return pdf_path if os.path.exists(pdf_path) else None
 
+    def existing_pdf_ids(self) -> Set[str]:
+        """Return the IDs of all documents with a PDF on disk."""
+        try:
+            with os.scandir(self.pdfs_path) as entries:
+                return {
+                    entry.name[:-4]
+                    for entry in entries
+                    if entry.name.endswith(".pdf") and entry.is_file()
+                }
+        except FileNotFoundError:
+            return set()
+
     def _load_index(self) -> None:
-        """Load the document index."""
+        """Load the document index.
+
+        The file is only parsed again when it has been replaced or modified
+        since this instance last read or wrote it.
+        """
         with self._lock:
-            if os.path.exists(self.index_path):
-                try:
-                    with open(self.index_path, "r") as f:
-                        self.index = json.load(f)
-                except Exception:
-                    logger.warning("Index file is corrupted; creating a new index.")
-                    self.index = {}
-                    self._save_index()
-            else:
+            stamp = self._index_file_stamp()
+            if stamp is None:
+                self.index = {}
+                self._save_index()
+                return
+            if stamp == self._index_stamp:
+                return
+            try:
+                with open(self.index_path, "rb") as f:
+                    self.index = orjson.loads(f.read())
+                self._index_stamp = stamp
+            except Exception:
+                logger.warning("Index file is corrupted; creating a new index.")
                 self.index = {}
                 self._save_index()
 
+    def _index_file_stamp(self) -> Optional[Tuple[int, int, int]]:
+        """Identify the current index file version by inode, mtime and size."""
+        try:
+            st = os.stat(self.index_path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
     def _save_index(self) -> None:
-        """Persist the document index to disk."""
+        """Persist the document index to disk.
+
+        The index is written to a temporary file and renamed into place so
+        readers never see a partially written index.
+        """
         with self._lock:
-            with open(self.index_path, "w") as f:
-                json.dump(self.index, f, indent=2)
+            tmp_path = f"{self.index_path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(orjson.dumps(self.index, option=orjson.OPT_SORT_KEYS))
+            os.replace(tmp_path, self.index_path)
+            self._index_stamp = self._index_file_stamp()
+
+    def flush_index(self) -> None:
+        """Persist index updates made with ``persist_index=False``."""
+        self._save_index()
 
     def store_document(
-        self, document_id: str, pdf_content: bytes, metadata: Dict
+        self,
+        document_id: str,
+        pdf_content: bytes,
+        metadata: Dict,
+        persist_index: bool = True,
     ) -> bool:
         """Store PDF and update index with metadata."""
-        with self._lock:
-            try:
-                os.makedirs(self.pdfs_path, exist_ok=True)
-                pdf_path = os.path.join(self.pdfs_path, f"{document_id}.pdf")
-                with open(pdf_path, "wb") as f:
-                    f.write(pdf_content)
+        return self.store_document_stream(
+            document_id,
+            [pdf_content],
+            metadata,
+            expected_size=len(pdf_content),
+            persist_index=persist_index,
+        )
+
+    def store_document_stream(
+        self,
+        document_id: str,
+        chunks: Iterable[bytes],
+        metadata: Dict,
+        expected_size: Optional[int] = None,
+        persist_index: bool = True,
+    ) -> bool:
+        """Write a PDF from an iterable of byte chunks and update the index.
 
+        Chunks go to a ``.part`` file that is renamed over the final path
+        once complete, so an interrupted download never leaves a truncated
+        PDF behind. Each write gets its own ``.part`` name, so two discovery
+        runs storing the same document never share a file; the index lock
+        is only held for the index update. A
+        BLAKE2b digest of the bytes is computed as they are written and
+        recorded as ``content_hash``; if it matches the stored copy the
+        ``.part`` file is discarded and the existing PDF is left untouched.
+
+        With ``persist_index=False`` the index is only updated in memory;
+        callers storing many documents call ``flush_index()`` once at the end.
+        """
+        pdf_path = self.pdf_path_for(document_id)
+        part_path = f"{pdf_path}.{uuid.uuid4().hex}.part"
+        try:
+            os.makedirs(self.pdfs_path, exist_ok=True)
+            digest = hashlib.blake2b(digest_size=16)
+            with open(part_path, "wb") as f:
+                if expected_size:
+                    _preallocate(f.fileno(), expected_size)
+                for chunk in chunks:
+                    f.write(chunk)
+                    digest.update(chunk)
+                # Drop any preallocated space the body did not fill.
+                f.truncate()
+                f.flush()
+                if SYNC_PDFS:
+                    os.fsync(f.fileno())
+                _drop_page_cache(f.fileno())
+            content_hash = digest.hexdigest()
+            previous = self.index.get(document_id) or {}
+            if previous.get("content_hash") == content_hash and os.path.exists(
+                pdf_path
+            ):
+                os.remove(part_path)
+            else:
+                os.replace(part_path, pdf_path)
+
+            with self._lock:
                 self.index[document_id] = {
-                    "pdf": os.path.relpath(pdf_path, self.base_path),
+                    "pdf": os.path.join(self._pdfs_relpath, f"{document_id}.pdf"),
                     "url": metadata.get("url"),
                     "hash": metadata.get("hash"),
+                    "content_hash": content_hash,
                     "date": metadata.get("date"),
                     "correlation_id": metadata.get("correlation_id"),
+                    "etag": metadata.get("etag"),
+                    "last_modified": metadata.get("last_modified"),
+                    "checked_at": metadata.get("checked_at"),
                 }
-                self._save_index()
-                logger.info(f"Stored document {document_id}.")
-                return True
-            except Exception as e:
-                logger.error(f"Error storing document {document_id}: {e}")
+                if persist_index:
+                    self._save_index()
+            logger.debug("Stored document %s.", document_id)
+            return True
+        except Exception as e:
+            logger.error(f"Error storing document {document_id}: {e}")
+            with contextlib.suppress(OSError):
+                os.remove(part_path)
+            return False
+
+    def update_document(
+        self, document_id: str, fields: Dict, persist_index: bool = True
+    ) -> bool:
+        """Merge fields into an existing index entry without touching the PDF."""
+        with self._lock:
+            entry = self.index.get(document_id)
+            if entry is None:
                 return False
+            entry.update(fields)
+            if persist_index:
+                self._save_index()
+            return True
 
     def get_pdf(self, document_id: str) -> Optional[bytes]:
         """Retrieve the PDF content for a document."""
-        with self._lock:
-            self._load_index()
-            entry = self.index.get(document_id)
-            if not entry:
-                return None
-            pdf_path = os.path.join(self.base_path, entry["pdf"])
-            try:
-                with open(pdf_path, "rb") as f:
-                    return f.read()
-            except Exception as e:
-                logger.error(f"Error reading PDF for {document_id}: {e}")
-                return None
+        self._load_index()
+        entry = self.index.get(document_id)
+        if not entry:
+            return None
+        pdf_path = os.path.join(self.base_path, entry["pdf"])
+        try:
+            with open(pdf_path, "rb") as f:
+                return f.read()
+        except Exception as e:
+            logger.error(f"Error reading PDF for {document_id}: {e}")
+            return None
 
     def get_pdf_path(self, document_id: str) -> Optional[str]:
         """Return the absolute path to the PDF file for a given document ID."""
-        with self._lock:
-            self._load_index()
-            entry = self.index.get(document_id)
-            if not entry:
-                return None
-            pdf_path = os.path.join(self.base_path, entry["pdf"])
-            return pdf_path if os.path.exists(pdf_path) else None
+        self._load_index()
+        entry = self.index.get(document_id)
+        if not entry:
+            return None
+        pdf_path = os.path.join(self.base_path, entry["pdf"])
+        return pdf_path if os.path.exists(pdf_path) else None
 
     def list_documents(self) -> List[Dict]:
         """List all documents with their metadata from the index."""
-        with self._lock:
-            self._load_index()
-            return [
-                {"document_id": doc_id, **entry} for doc_id, entry in self.index.items()
-            ]
+        self._load_index()
+        return [
+            {"document_id": doc_id, **entry}
+            for doc_id, entry in self.index.copy().items()
+        ]
 
     def delete_document(self, document_id: str) -> bool:
         """Delete a document's PDF and index entry."""
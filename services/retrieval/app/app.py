@@ -1,8 +1,10 @@
+import asyncio
 import logging
 import os
 import sys
 import time
 import uuid
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 
 from consumers import get_metrics, start_consumer_thread
@@ -11,7 +13,7 @@ from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from qdrant_client import QdrantClient
 from retrieval import RetrievalService
-from retrieval_events import publish_retrieval_completed_event
+from retrieval_events import close_publisher, publish_retrieval_completed_event
 
 RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "5"))
 
@@ -39,17 +41,21 @@ logging.basicConfig(
 )
 
 rabbitmq_host = os.getenv("RABBITMQ_HOST", "rabbitmq")
-app = FastAPI(title="MARP Retrieval Service", version="1.0.0")
-
-service = RetrievalService()
 
 
-@app.on_event("startup")
-async def startup_event():
-    """Start background event consumers on app startup."""
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background event consumers and close the publisher on shutdown."""
     logger.info("Starting Retrieval Service")
     start_consumer_thread()
     logger.info("Retrieval Service ready")
+    yield
+    await asyncio.to_thread(close_publisher)
+
+
+app = FastAPI(title="MARP Retrieval Service", version="1.0.0", lifespan=lifespan)
+
+service = RetrievalService()
 
 
 @app.get("/debug/vector-store")
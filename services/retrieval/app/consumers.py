@@ -10,6 +10,14 @@ logger = logging.getLogger("retrieval.consumers")
 
 EXCHANGE_NAME = "document_events"
 
+# ChunksIndexed arrives one message per chunk. Deliveries are prefetched in
+# bulk and acknowledged in ranges: when a document's final chunk arrives,
+# after ACK_BATCH_SIZE messages, or ACK_FLUSH_INTERVAL seconds after the
+# first unacknowledged one.
+CHUNKS_INDEXED_PREFETCH = int(os.getenv("CHUNKS_INDEXED_PREFETCH", "256"))
+ACK_BATCH_SIZE = 64
+ACK_FLUSH_INTERVAL = 0.5
+
 # Metrics tracking
 chunks_indexed_count = 0
 documents_indexed_count = 0
@@ -88,6 +96,29 @@ def consume_chunks_indexed_events():
         channel.queue_bind(
             exchange=EXCHANGE_NAME, queue=queue_name, routing_key="chunks.indexed"
         )
+        channel.basic_qos(prefetch_count=CHUNKS_INDEXED_PREFETCH)
+
+        pending_acks = {"tag": 0, "count": 0, "timer": None}
+
+        def flush_acks():
+            """Acknowledge every delivery up to the highest pending tag."""
+            if pending_acks["timer"] is not None:
+                connection.remove_timeout(pending_acks["timer"])
+                pending_acks["timer"] = None
+            if pending_acks["count"]:
+                channel.basic_ack(delivery_tag=pending_acks["tag"], multiple=True)
+                pending_acks["count"] = 0
+
+        def ack(delivery_tag, flush=False):
+            """Record a processed delivery, acknowledging in batches."""
+            pending_acks["tag"] = delivery_tag
+            pending_acks["count"] += 1
+            if flush or pending_acks["count"] >= ACK_BATCH_SIZE:
+                flush_acks()
+            elif pending_acks["timer"] is None:
+                pending_acks["timer"] = connection.call_later(
+                    ACK_FLUSH_INTERVAL, flush_acks
+                )
 
         def callback(ch, method, properties, body):
             global chunks_indexed_count, documents_indexed_count
@@ -101,7 +132,7 @@ def consume_chunks_indexed_events():
                 event_type = event.get("eventType")
                 if event_type != "ChunksIndexed":
                     logger.warning(f"Unexpected event type: {event_type}")
-                    ch.basic_ack(delivery_tag=method.delivery_tag)
+                    ack(method.delivery_tag)
                     return
 
                 correlation_id = event.get(
@@ -176,7 +207,7 @@ def consume_chunks_indexed_events():
                     f"Processed chunk indexed event: " f"{chunk_id} for {document_id}"
                 )
 
-                ch.basic_ack(delivery_tag=method.delivery_tag)
+                ack(method.delivery_tag, flush=chunk_index == total_chunks - 1)
 
             except json.JSONDecodeError as exc:
                 logger.error(
@@ -190,7 +221,7 @@ def consume_chunks_indexed_events():
                     },
                     exc_info=True,
                 )
-                ch.basic_ack(delivery_tag=method.delivery_tag)
+                ack(method.delivery_tag)
             except Exception as exc:
                 logger.error(
                     f"Error processing ChunksIndexed event: {exc}",
@@ -203,6 +234,8 @@ def consume_chunks_indexed_events():
                     },
                     exc_info=True,
                 )
+                # A ranged ack would also settle this tag, so flush first.
+                flush_acks()
                 ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
 
         channel.basic_consume(queue=queue_name, on_message_callback=callback)
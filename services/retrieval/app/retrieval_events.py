@@ -1,17 +1,68 @@
 import json
 import logging
 import os
+import threading
 import uuid
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Dict, Optional
+from typing import Any, Dict, Optional
 
 import pika
+from pika.exceptions import AMQPError
 
 logger = logging.getLogger("retrieval.events")
 
 EXCHANGE_NAME = "document_events"
 
+# One connection is shared by every publish instead of opening a new one per
+# query. Request threads take turns on it since pika is not thread-safe.
+_publisher_lock = threading.Lock()
+_publisher: Dict[str, Any] = {"url": None, "connection": None, "channel": None}
+
+
+def _get_channel(rabbitmq_url: str):
+    """Return the shared publishing channel, connecting if needed.
+
+    A reused connection is pumped first: that answers heartbeats missed
+    while idle and raises if the broker has already dropped the link.
+    """
+    connection = _publisher["connection"]
+    if (
+        connection is not None
+        and not connection.is_closed
+        and _publisher["url"] == rabbitmq_url
+    ):
+        try:
+            connection.process_data_events()
+            return _publisher["channel"]
+        except AMQPError as e:
+            logger.warning(f"Shared RabbitMQ connection lost; reconnecting: {e}")
+    _close_publisher()
+    connection = pika.BlockingConnection(pika.URLParameters(rabbitmq_url))
+    channel = connection.channel()
+    channel.exchange_declare(
+        exchange=EXCHANGE_NAME, exchange_type="topic", durable=True
+    )
+    _publisher.update(url=rabbitmq_url, connection=connection, channel=channel)
+    return channel
+
+
+def close_publisher() -> None:
+    """Close the shared publishing connection, e.g. on shutdown."""
+    with _publisher_lock:
+        _close_publisher()
+
+
+def _close_publisher() -> None:
+    """Drop the shared connection, closing it if still open."""
+    connection = _publisher["connection"]
+    _publisher.update(url=None, connection=None, channel=None)
+    if connection is not None and not connection.is_closed:
+        try:
+            connection.close()
+        except AMQPError:
+            pass
+
 
 @dataclass
 class QueryReceived:
@@ -43,12 +94,6 @@ def publish_retrieval_completed_event(
 
     try:
         logger.info("Publishing RetrievalCompleted event")
-        connection = pika.BlockingConnection(pika.URLParameters(rabbitmq_url))
-        channel = connection.channel()
-        channel.exchange_declare(
-            exchange=EXCHANGE_NAME, exchange_type="topic", durable=True
-        )
-
         event = {
             "eventType": "RetrievalCompleted",
             "eventId": str(uuid.uuid4()),
@@ -64,15 +109,27 @@ def publish_retrieval_completed_event(
             },
         }
 
-        channel.basic_publish(
-            exchange=EXCHANGE_NAME,
-            routing_key="retrievalcompleted",
-            body=json.dumps(event),
-            properties=pika.BasicProperties(delivery_mode=2),
-        )
+        body = json.dumps(event)
+        properties = pika.BasicProperties(delivery_mode=2)
+
+        with _publisher_lock:
+            # An idle shared connection may have been dropped by the broker
+            # since the last query, so reconnect once before giving up.
+            for attempt in range(2):
+                try:
+                    _get_channel(rabbitmq_url).basic_publish(
+                        exchange=EXCHANGE_NAME,
+                        routing_key="retrievalcompleted",
+                        body=body,
+                        properties=properties,
+                    )
+                    break
+                except AMQPError:
+                    _close_publisher()
+                    if attempt:
+                        raise
 
         logger.info(f"Published RetrievalCompleted: {query_id}")
-        connection.close()
 
     except Exception as e:
         logger.error(f"Failed to publish RetrievalCompleted event: {e}", exc_info=True)
@@ -29,6 +29,24 @@ class TestIngestionAppEndpoints:
         assert response.status_code == 200
         assert response.json() == {"message": "Ingestion Service is running"}
 
+    def test_correlation_id_header_is_echoed(self):
+        """Test a supplied X-Correlation-ID is returned on the response."""
+        from services.ingestion.app.app import app
+
+        client = TestClient(app)
+        response = client.get("/", headers={"X-Correlation-ID": "corr-abc"})
+
+        assert response.headers["x-correlation-id"] == "corr-abc"
+
+    def test_correlation_id_header_is_generated(self):
+        """Test a correlation ID is generated when the request has none."""
+        from services.ingestion.app.app import app
+
+        client = TestClient(app)
+        response = client.get("/")
+
+        assert response.headers["x-correlation-id"]
+
     def test_health_endpoint_healthy(self):
         """Test /health returns healthy when RabbitMQ is up."""
         from services.ingestion.app.app import app, event_publisher
@@ -173,23 +191,49 @@ class TestIngestionAppEndpoints:
 class TestIngestionBackgroundTasks:
     """Test background discovery functionality."""
 
-    @patch("services.ingestion.app.app.threading.Thread")
-    def test_run_discovery_background(self, mock_thread):
-        """Test run_discovery_background starts daemon thread."""
-        from services.ingestion.app.app import run_discovery_background
-
-        run_discovery_background()
-
-        # Verify thread was created with daemon=True
-        mock_thread.assert_called_once()
-        call_kwargs = mock_thread.call_args[1]
-        assert call_kwargs["daemon"] is True
-
-    @patch("services.ingestion.app.app.run_discovery_background")
-    def test_startup_event_handler(self, mock_run_discovery):
-        """Test startup event handler calls run_discovery_background."""
-        from services.ingestion.app.app import start_background_discovery
-
-        start_background_discovery()
-
-        mock_run_discovery.assert_called_once()
+    def test_lifespan_starts_and_cancels_discovery_task(self):
+        """Test lifespan runs periodic discovery and cancels it on shutdown."""
+        import asyncio
+
+        from services.ingestion.app import app as app_module
+
+        started = asyncio.Event()
+        cancelled = []
+
+        async def fake_periodic_discovery():
+            started.set()
+            try:
+                await asyncio.sleep(3600)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        async def run_lifespan():
+            async with app_module.lifespan(app_module.app):
+                await asyncio.wait_for(started.wait(), timeout=1)
+
+        with patch.object(
+            app_module, "_periodic_discovery", side_effect=fake_periodic_discovery
+        ):
+            asyncio.run(run_lifespan())
+
+        assert cancelled == [True]
+
+    def test_run_discovery_cycle_publishes_events(self):
+        """Test a discovery cycle publishes one event per new document."""
+        from services.ingestion.app import app as app_module
+
+        mock_docs = [Mock(), Mock()]
+        with (
+            patch.object(
+                app_module.document_discoverer,
+                "discover_and_process_documents",
+                return_value=mock_docs,
+            ),
+            patch.object(
+                app_module, "publish_document_discovered_event"
+            ) as mock_publish,
+        ):
+            app_module._run_discovery_cycle("corr-123")
+
+        assert mock_publish.call_count == 2
@@ -35,7 +35,7 @@ TEMP_STORAGE_DIR = tempfile.mkdtemp()
 os.environ["STORAGE_DIR"] = TEMP_STORAGE_DIR
 
 from app import app, storage
-from discoverer import MARPDocumentDiscoverer
+from discoverer import MARPDocumentDiscoverer, document_id_for_url
 from events import EventTypes
 from extractor import PDFLinkExtractor
 from storage import DocumentStorage
@@ -221,6 +221,7 @@ def mock_http_responses(sample_pdf_content):
 
         if url.endswith(".pdf"):
             response.content = sample_pdf_content
+            response.iter_content = Mock(return_value=iter([sample_pdf_content]))
             response.headers = {
                 "content-type": "application/pdf",
                 "content-length": str(len(sample_pdf_content)),
@@ -266,6 +267,74 @@ def test_pdf_link_extractor(sample_html_with_pdfs):
     assert any("student-handbook.pdf" in url for url in urls)
 
 
+@pytest.mark.skipif(PDFLinkExtractor is None, reason="PDFLinkExtractor not importable")
+def test_pdf_link_extractor_regex_matches_bs4(sample_html_with_pdfs):
+    """Test the regex scan finds the same links as the BeautifulSoup parser"""
+    from services.ingestion.app.extractor import PDFLinkExtractor
+
+    base_url = "https://lancaster.ac.uk/marp/"
+    html = sample_html_with_pdfs.replace(
+        "</div>",
+        "<a href=policy.PDF>p</a><a href='a&amp;b.pdf'>q</a><link href='x.pdf'>"
+        '<a href="form.pdf?v=2">f</a><a href="policy.PDF#page=3">p3</a>'
+        '<a href="/page?doc=x.pdf&amp;y=1">no</a><a href="y.pdf.html">no</a>'
+        '<a data-href="/b.pdf" href="/c.html">no</a><a title="x>y" href="/g.pdf">g</a>'
+        '<!-- <a href="/old.pdf">old</a> -->'
+        "</div>",
+    )
+
+    regex_urls = PDFLinkExtractor(base_url, parser="regex").get_pdf_urls(html)
+    bs4_urls = PDFLinkExtractor(base_url, parser="bs4").get_pdf_urls(html)
+
+    assert regex_urls == bs4_urls
+    assert "https://lancaster.ac.uk/marp/a&b.pdf" in regex_urls
+    assert "https://lancaster.ac.uk/marp/form.pdf?v=2" in regex_urls
+    assert regex_urls.count("https://lancaster.ac.uk/marp/policy.PDF") == 1
+    assert "https://lancaster.ac.uk/g.pdf" in regex_urls
+    assert "https://lancaster.ac.uk/b.pdf" not in regex_urls
+    assert "https://lancaster.ac.uk/old.pdf" not in regex_urls
+
+
+@pytest.mark.skipif(PDFLinkExtractor is None, reason="PDFLinkExtractor not importable")
+def test_pdf_link_extractor_deduplicates(sample_html_with_pdfs):
+    """Test a PDF linked from several places is returned once, in page order"""
+    from services.ingestion.app.extractor import PDFLinkExtractor
+
+    html = sample_html_with_pdfs.replace(
+        "</div>",
+        '<a href="https://lancaster.ac.uk/documents/general-regulations.pdf">'
+        "again</a></div>",
+    )
+    urls = PDFLinkExtractor("https://lancaster.ac.uk/marp/").get_pdf_urls(html)
+
+    assert len(urls) == 3
+    assert urls[0].endswith("general-regulations.pdf")
+
+
+@pytest.mark.skipif(PDFLinkExtractor is None, reason="PDFLinkExtractor not importable")
+@pytest.mark.parametrize(
+    "href",
+    [
+        "https://lancaster.ac.uk/docs/a.pdf",
+        "/documents/b.pdf",
+        "//cdn.lancaster.ac.uk/c.pdf",
+        "relative/d.pdf",
+        "../e.pdf",
+        "/documents/../f.pdf",
+    ],
+)
+def test_pdf_link_extractor_resolves_like_urljoin(href):
+    """Test the href fast paths resolve exactly as urljoin does"""
+    from urllib.parse import urljoin
+
+    from services.ingestion.app.extractor import PDFLinkExtractor
+
+    base_url = "https://lancaster.ac.uk/marp/index/"
+    extractor = PDFLinkExtractor(base_url)
+
+    assert extractor._resolve(href) == urljoin(base_url, href)
+
+
 @pytest.mark.skipif(DocumentStorage is None, reason="DocumentStorage not importable")
 def test_document_storage_store_and_retrieve(document_storage, sample_pdf_content):
     """Test storing and retrieving documents"""
@@ -359,8 +428,12 @@ def test_document_discoverer_skip_unchanged(
 ):
     """Test that unchanged documents are skipped"""
     with (
-        patch("discoverer.requests.get", side_effect=mock_http_responses["get"]),
-        patch("discoverer.requests.head", side_effect=mock_http_responses["head"]),
+        patch(
+            "discoverer.requests.Session.get", side_effect=mock_http_responses["get"]
+        ),
+        patch(
+            "discoverer.requests.Session.head", side_effect=mock_http_responses["head"]
+        ),
     ):
 
         discoverer = MARPDocumentDiscoverer(temp_storage_dir)
@@ -368,11 +441,21 @@ def test_document_discoverer_skip_unchanged(
         test_url = "https://lancaster.ac.uk/docs/test.pdf"
 
         # First discovery - should process
-        discovered_docs_1 = discoverer.process_documents([test_url], correlation_id)
+        discovered_docs_1 = list(
+            discoverer.process_documents([test_url], correlation_id)
+        )
         assert len(discovered_docs_1) == 1
 
+        # The PDF is stored under the configured storage dir
+        file_path = discoverer.storage.pdf_path_for(document_id_for_url(test_url))
+        assert file_path.startswith(os.path.abspath(temp_storage_dir))
+        with open(file_path, "rb") as f:
+            assert f.read() == sample_pdf_content
+
         # Second discovery - should skip (same hash)
-        discovered_docs_2 = discoverer.process_documents([test_url], correlation_id)
+        discovered_docs_2 = list(
+            discoverer.process_documents([test_url], correlation_id)
+        )
         assert len(discovered_docs_2) == 0
 
 
@@ -383,23 +466,23 @@ def test_document_discoverer_detect_update(
     temp_storage_dir, mock_http_responses, sample_pdf_content
 ):
     """Test that document updates are detected"""
-    call_count = [0]
-
-    def mock_head_changing(url, *args, **kwargs):
-        response = Mock()
-        response.status_code = 200
-        call_count[0] += 1
-        # Change last-modified header on second call
-        response.headers = {
-            "last-modified": f"Wed, 27 Nov 2024 12:00:0{call_count[0]} GMT",
-            "content-type": "application/pdf",
-        }
-        response.raise_for_status = Mock()
+    get_count = [0]
+
+    def mock_get_changing(url, *args, **kwargs):
+        response = mock_http_responses["get"](url, *args, **kwargs)
+        # Serve different bytes and a new last-modified on each download
+        response.headers["last-modified"] = (
+            f"Wed, 27 Nov 2024 12:00:0{get_count[0]} GMT"
+        )
+        get_count[0] += 1
+        body = sample_pdf_content + str(get_count[0]).encode()
+        response.iter_content = Mock(return_value=iter([body]))
         return response
 
     with (
-        patch("discoverer.requests.get", side_effect=mock_http_responses["get"]),
-        patch("discoverer.requests.head", side_effect=mock_head_changing),
+        patch("discoverer.requests.Session.get", side_effect=mock_get_changing),
+        # Re-check immediately instead of waiting out the staleness window
+        patch("discoverer.CHECK_STALENESS", 0),
     ):
 
         discoverer = MARPDocumentDiscoverer(temp_storage_dir)
@@ -407,14 +490,52 @@ def test_document_discoverer_detect_update(
         test_url = "https://lancaster.ac.uk/docs/test.pdf"
 
         # First discovery
-        discovered_docs_1 = discoverer.process_documents([test_url], correlation_id)
+        discovered_docs_1 = list(
+            discoverer.process_documents([test_url], correlation_id)
+        )
         assert len(discovered_docs_1) == 1
 
         # Second discovery with changed hash - should process again
-        discovered_docs_2 = discoverer.process_documents([test_url], correlation_id)
+        discovered_docs_2 = list(
+            discoverer.process_documents([test_url], correlation_id)
+        )
         assert len(discovered_docs_2) == 1
 
 
+@pytest.mark.skipif(
+    MARPDocumentDiscoverer is None, reason="MARPDocumentDiscoverer not importable"
+)
+def test_document_discoverer_ignores_header_only_change(
+    temp_storage_dir, mock_http_responses
+):
+    """Test a new Last-Modified with identical bytes emits no event"""
+    get_count = [0]
+
+    def mock_get_changing(url, *args, **kwargs):
+        response = mock_http_responses["get"](url, *args, **kwargs)
+        # Same bytes, but a new last-modified on each download
+        response.headers["last-modified"] = (
+            f"Wed, 27 Nov 2024 12:00:0{get_count[0]} GMT"
+        )
+        get_count[0] += 1
+        return response
+
+    with (
+        patch("discoverer.requests.Session.get", side_effect=mock_get_changing),
+        # Re-check immediately instead of waiting out the staleness window
+        patch("discoverer.CHECK_STALENESS", 0),
+    ):
+        discoverer = MARPDocumentDiscoverer(temp_storage_dir)
+        test_url = "https://lancaster.ac.uk/docs/test.pdf"
+
+        assert len(list(discoverer.process_documents([test_url], "corr-1"))) == 1
+        assert list(discoverer.process_documents([test_url], "corr-2")) == []
+
+        # The refreshed validators are recorded so the next run skips early
+        doc_id = next(iter(discoverer.storage.index))
+        assert discoverer.storage.index[doc_id]["last_modified"].endswith("01 GMT")
+
+
 # --- FastAPI Endpoint Integration Tests ---
 
 
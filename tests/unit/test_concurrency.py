@@ -0,0 +1,135 @@
+"""
+Unit tests for AdaptiveConcurrencyLimiter.
+
+Target: services/ingestion/app/concurrency.py
+"""
+
+import threading
+from unittest.mock import patch
+
+import pytest
+
+
+class TestAdaptiveConcurrencyLimiter:
+    """Test slot accounting and throughput-driven limit adjustment."""
+
+    def test_rejects_initial_outside_bounds(self):
+        """Test the initial limit must lie within the bounds."""
+        from services.ingestion.app.concurrency import AdaptiveConcurrencyLimiter
+
+        with pytest.raises(ValueError):
+            AdaptiveConcurrencyLimiter(initial=1, minimum=2, maximum=4)
+
+    def test_acquire_blocks_when_limit_reached(self):
+        """Test acquire waits until another download releases its slot."""
+        from services.ingestion.app.concurrency import AdaptiveConcurrencyLimiter
+
+        limiter = AdaptiveConcurrencyLimiter(initial=2, minimum=2, maximum=2)
+        limiter.acquire()
+        limiter.acquire()
+
+        acquired = threading.Event()
+
+        def third_download():
+            limiter.acquire()
+            acquired.set()
+
+        worker = threading.Thread(target=third_download)
+        worker.start()
+        assert not acquired.wait(timeout=0.1)
+
+        limiter.release()
+        assert acquired.wait(timeout=1)
+        worker.join()
+
+    def test_limit_grows_while_throughput_improves(self):
+        """Test the limit keeps stepping up while throughput rises."""
+        from services.ingestion.app import concurrency
+
+        clock = [0.0]
+        with patch.object(concurrency.time, "monotonic", lambda: clock[0]):
+            limiter = concurrency.AdaptiveConcurrencyLimiter(
+                initial=4, minimum=2, maximum=32, window=1.0
+            )
+            # Another download stays in flight, so the limiter never idles
+            limiter.acquire()
+            for nbytes in (1_000, 2_000, 3_000):
+                clock[0] += 1.0
+                limiter.acquire()
+                limiter.release(nbytes)
+
+        assert limiter.limit == 7
+
+    def test_limit_reverses_when_throughput_drops(self):
+        """Test the limit steps back once throughput falls."""
+        from services.ingestion.app import concurrency
+
+        clock = [0.0]
+        with patch.object(concurrency.time, "monotonic", lambda: clock[0]):
+            limiter = concurrency.AdaptiveConcurrencyLimiter(
+                initial=4, minimum=2, maximum=32, window=1.0
+            )
+            # Another download stays in flight, so the limiter never idles
+            limiter.acquire()
+            for nbytes in (1_000, 2_000, 500):
+                clock[0] += 1.0
+                limiter.acquire()
+                limiter.release(nbytes)
+
+        assert limiter.limit == 5
+
+    def test_limit_stays_within_bounds(self):
+        """Test the limit never leaves [minimum, maximum]."""
+        from services.ingestion.app import concurrency
+
+        clock = [0.0]
+        with patch.object(concurrency.time, "monotonic", lambda: clock[0]):
+            limiter = concurrency.AdaptiveConcurrencyLimiter(
+                initial=3, minimum=2, maximum=4, window=1.0
+            )
+            # Another download stays in flight, so the limiter never idles
+            limiter.acquire()
+            for nbytes in range(1_000, 10_000, 1_000):
+                clock[0] += 1.0
+                limiter.acquire()
+                limiter.release(nbytes)
+
+        assert limiter.limit == 4
+
+    def test_idle_gap_starts_a_fresh_window(self):
+        """Test time spent idle between cycles is not counted as a window."""
+        from services.ingestion.app import concurrency
+
+        clock = [0.0]
+        with patch.object(concurrency.time, "monotonic", lambda: clock[0]):
+            limiter = concurrency.AdaptiveConcurrencyLimiter(
+                initial=4, minimum=2, maximum=32, window=1.0
+            )
+            limiter.acquire()
+            clock[0] += 1.0
+            limiter.release(1_000)
+            # A long idle gap, then a cycle at the same throughput
+            clock[0] += 600.0
+            limiter.acquire()
+            clock[0] += 1.0
+            limiter.release(1_000)
+
+        # Same throughput as before: no reversal, the limit keeps climbing
+        assert limiter.limit == 6
+
+    def test_zero_byte_releases_do_not_close_a_window(self):
+        """Test releases that downloaded nothing are not throughput samples."""
+        from services.ingestion.app import concurrency
+
+        clock = [0.0]
+        with patch.object(concurrency.time, "monotonic", lambda: clock[0]):
+            limiter = concurrency.AdaptiveConcurrencyLimiter(
+                initial=4, minimum=2, maximum=32, window=1.0
+            )
+            limiter.acquire()
+            for _ in range(5):
+                clock[0] += 1.0
+                limiter.acquire()
+                limiter.release(0)
+
+        assert limiter.limit == 4
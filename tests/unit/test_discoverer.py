@@ -10,6 +10,7 @@ import tempfile
 from pathlib import Path
 from unittest.mock import Mock, patch
 
+import pytest
 import requests
 
 # Add service app directory to Python path to match Docker environment
@@ -23,6 +24,15 @@ if str(ingestion_app) not in sys.path:
 class TestMARPDocumentDiscoverer:
     """Test MARPDocumentDiscoverer initialization and document discovery."""
 
+    @pytest.fixture(autouse=True)
+    def clear_document_id_cache(self):
+        """Keep IDs memoised under a patched hashlib from leaking between tests."""
+        from discoverer import document_id_for_url
+
+        document_id_for_url.cache_clear()
+        yield
+        document_id_for_url.cache_clear()
+
     @patch("discoverer.DocumentStorage")
     @patch("discoverer.PDFLinkExtractor")
     def test_discoverer_initialization(self, mock_extractor_class, mock_storage_class):
@@ -42,66 +52,53 @@ class TestMARPDocumentDiscoverer:
             assert discoverer.extractor == mock_extractor_instance
             mock_storage_class.assert_called_once_with(tmpdir)
 
+    def test_document_id_for_url_is_stable(self):
+        """Test document IDs stay SHA-256 of the URL so indexed chunks match."""
+        from discoverer import document_id_for_url
+
+        url = "https://test.com/doc.pdf"
+        assert document_id_for_url(url) == (
+            "a29501d5d87f4a94ace9456aa605feba515f2868670e0d2353114f743695ec3a"
+        )
+
     @patch("discoverer.DocumentStorage")
     @patch("discoverer.PDFLinkExtractor")
-    @patch("discoverer.hashlib")
-    @patch("discoverer.requests")
-    def test_get_document_hash_success(
-        self, mock_requests, mock_hashlib, mock_extractor_class, mock_storage_class
+    def test_discoverer_session_retries_gateway_errors(
+        self, mock_extractor_class, mock_storage_class
     ):
-        """Test _get_document_hash generates hash from HTTP headers."""
-        from discoverer import MARPDocumentDiscoverer
+        """Test the shared session pools connections and retries 5xx gateways."""
+        from discoverer import MAX_CONCURRENT_DOWNLOADS, MARPDocumentDiscoverer
 
         with tempfile.TemporaryDirectory() as tmpdir:
-            # Mock DocumentStorage and PDFLinkExtractor
-            mock_storage_class.return_value = Mock()
-            mock_extractor_class.return_value = Mock()
-
-            # Mock HTTP response with headers
-            mock_response = Mock()
-            mock_response.headers = {"last-modified": "2024-01-01"}
-            mock_response.raise_for_status = Mock()
-            mock_requests.head.return_value = mock_response
+            discoverer = MARPDocumentDiscoverer(storage_dir=tmpdir)
 
-            # Mock hash computation
-            mock_hash = Mock()
-            mock_hash.hexdigest.return_value = "abc123def456"
-            mock_hashlib.sha256.return_value = mock_hash
+        adapter = discoverer.session.get_adapter(discoverer.BASE_URL)
+        assert adapter.max_retries.total == 3
+        assert set(adapter.max_retries.status_forcelist) == {502, 503, 504}
+        assert adapter.max_retries.backoff_jitter > 0
+        assert adapter._pool_maxsize == MAX_CONCURRENT_DOWNLOADS
 
-            discoverer = MARPDocumentDiscoverer(storage_dir=tmpdir)
+    def test_document_id_for_url_is_memoised(self):
+        """Test repeated URLs are hashed only once."""
+        from discoverer import document_id_for_url
 
-        result = discoverer._get_document_hash("https://test.com/doc.pdf")
+        url = "https://test.com/memo.pdf"
+        with patch("discoverer.hashlib") as mock_hashlib:
+            mock_hashlib.sha256.return_value.hexdigest.return_value = "memo-id"
+            assert document_id_for_url(url) == "memo-id"
+            assert document_id_for_url(url) == "memo-id"
 
-        assert result == "abc123def456"
-        mock_requests.head.assert_called_once_with(
-            "https://test.com/doc.pdf", allow_redirects=True, timeout=10
-        )
         mock_hashlib.sha256.assert_called_once()
 
-    @patch("discoverer.DocumentStorage")
-    @patch("discoverer.PDFLinkExtractor")
-    @patch("discoverer.requests")
-    def test_get_document_hash_http_error(
-        self, mock_requests, mock_extractor_class, mock_storage_class
-    ):
-        """Test _get_document_hash handles HTTP errors."""
+    def test_hash_from_headers_prefers_etag(self):
+        """Test the stored validator is the ETag, then Last-Modified, then size."""
         from discoverer import MARPDocumentDiscoverer
 
-        with tempfile.TemporaryDirectory() as tmpdir:
-            mock_storage_class.return_value = Mock()
-            mock_extractor_class.return_value = Mock()
-
-            # Mock requests.RequestException properly
-            mock_requests.RequestException = requests.RequestException
-            mock_requests.head.side_effect = requests.RequestException(
-                "Connection failed"
-            )
-
-            discoverer = MARPDocumentDiscoverer(storage_dir=tmpdir)
-
-            result = discoverer._get_document_hash("https://test.com/doc.pdf")
-
-            assert result == ""
+        hash_from_headers = MARPDocumentDiscoverer._hash_from_headers
+        assert hash_from_headers({"etag": '"v1"', "last-modified": "x"}) == '"v1"'
+        assert hash_from_headers({"last-modified": "x"}) == "x"
+        assert hash_from_headers({"content-length": "42"}) == "42"
+        assert hash_from_headers({}) == ""
 
     @patch("discoverer.DocumentStorage")
     @patch("discoverer.PDFLinkExtractor")
@@ -112,13 +109,16 @@ class TestMARPDocumentDiscoverer:
         """Test discover_document_urls extracts PDF links from page."""
         from discoverer import MARPDocumentDiscoverer
 
+        mock_session = mock_requests.Session.return_value
+
         with tempfile.TemporaryDirectory() as tmpdir:
             # Mock HTTP response
             mock_response = Mock()
             mock_response.text = "<html>mock html</html>"
             mock_response.status_code = 200
+            mock_response.headers = {}
             mock_response.raise_for_status = Mock()
-            mock_requests.get.return_value = mock_response
+            mock_session.get.return_value = mock_response
 
             # Mock storage and extractor
             mock_storage_class.return_value = Mock()
@@ -137,7 +137,36 @@ class TestMARPDocumentDiscoverer:
         assert "https://test.com/doc1.pdf" in urls
         assert "https://test.com/doc2.pdf" in urls
 
-        mock_requests.get.assert_called_once()
+        mock_session.get.assert_called_once()
+        mock_extractor.get_pdf_urls.assert_called_once()
+
+    @patch("discoverer.DocumentStorage")
+    @patch("discoverer.PDFLinkExtractor")
+    @patch("discoverer.requests")
+    def test_discover_document_urls_reuses_cache_when_not_modified(
+        self, mock_requests, mock_extractor_class, mock_storage_class
+    ):
+        """Test an unchanged MARP page (304) returns cached URLs unparsed."""
+        from discoverer import MARPDocumentDiscoverer
+
+        mock_session = mock_requests.Session.return_value
+        urls = ["https://test.com/doc1.pdf"]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            mock_storage_class.return_value = Mock()
+            mock_extractor = Mock()
+            mock_extractor.get_pdf_urls.return_value = urls
+            mock_extractor_class.return_value = mock_extractor
+
+            first = Mock(status_code=200, text="<html/>", headers={"etag": '"p1"'})
+            mock_session.get.return_value = first
+            discoverer = MARPDocumentDiscoverer(storage_dir=tmpdir)
+            assert discoverer.discover_document_urls() == urls
+
+            mock_session.get.return_value = Mock(status_code=304)
+            assert discoverer.discover_document_urls() == urls
+
+        assert mock_session.get.call_args[1]["headers"] == {"If-None-Match": '"p1"'}
         mock_extractor.get_pdf_urls.assert_called_once()
 
     @patch("discoverer.DocumentStorage")
@@ -149,13 +178,15 @@ class TestMARPDocumentDiscoverer:
         """Test discover_document_urls handles HTTP errors."""
         from discoverer import MARPDocumentDiscoverer
 
+        mock_session = mock_requests.Session.return_value
+
         with tempfile.TemporaryDirectory() as tmpdir:
             mock_storage_class.return_value = Mock()
             mock_extractor_class.return_value = Mock()
 
             # Mock requests.RequestException properly
             mock_requests.RequestException = requests.RequestException
-            mock_requests.get.side_effect = requests.RequestException("404 Not Found")
+            mock_session.get.side_effect = requests.RequestException("404 Not Found")
 
             discoverer = MARPDocumentDiscoverer(storage_dir=tmpdir)
 
@@ -165,20 +196,20 @@ class TestMARPDocumentDiscoverer:
 
     @patch("discoverer.DocumentStorage")
     @patch("discoverer.PDFLinkExtractor")
-    @patch("discoverer.os.path.exists")
     @patch("discoverer.hashlib")
     @patch("discoverer.requests")
     def test_process_documents_new_document(
         self,
         mock_requests,
         mock_hashlib,
-        mock_exists,
         mock_extractor_class,
         mock_storage_class,
     ):
         """Test process_documents handles new document."""
         from discoverer import MARPDocumentDiscoverer
 
+        mock_session = mock_requests.Session.return_value
+
         with tempfile.TemporaryDirectory() as tmpdir:
             # Mock storage
             mock_storage = Mock()
@@ -188,7 +219,7 @@ class TestMARPDocumentDiscoverer:
             mock_extractor_class.return_value = Mock()
 
             # Mock file doesn't exist yet
-            mock_exists.return_value = False
+            mock_storage.existing_pdf_ids.return_value = set()
 
             # Mock hash for URL and content
             def sha256_side_effect(data):
@@ -209,48 +240,52 @@ class TestMARPDocumentDiscoverer:
             mock_head_response.raise_for_status = Mock()
 
             mock_get_response = Mock()
-            mock_get_response.content = b"pdf content"
+            mock_get_response.headers = {}
+            mock_get_response.iter_content.return_value = iter([b"pdf content"])
             mock_get_response.raise_for_status = Mock()
 
-            mock_requests.head.return_value = mock_head_response
-            mock_requests.get.return_value = mock_get_response
+            mock_session.head.return_value = mock_head_response
+            mock_session.get.return_value = mock_get_response
             mock_requests.RequestException = requests.RequestException
 
             discoverer = MARPDocumentDiscoverer(storage_dir=tmpdir)
 
             urls = ["https://test.com/new-doc.pdf"]
-            discoverer.process_documents(urls, correlation_id="corr-123")
+            list(discoverer.process_documents(urls, correlation_id="corr-123"))
 
         # Verify document was stored
-        mock_storage.store_document.assert_called_once()
-        store_call = mock_storage.store_document.call_args
+        mock_storage.store_document_stream.assert_called_once()
+        store_call = mock_storage.store_document_stream.call_args
 
         assert store_call[1]["document_id"] == "newdocid"  # keyword arg
-        assert store_call[1]["pdf_content"] == b"pdf content"
+        assert b"".join(store_call[1]["chunks"]) == b"pdf content"
+        # New documents are downloaded without a preceding HEAD
+        mock_session.head.assert_not_called()
 
     @patch("discoverer.DocumentStorage")
     @patch("discoverer.PDFLinkExtractor")
-    @patch("discoverer.os.path.exists")
     @patch("discoverer.hashlib")
     @patch("discoverer.requests")
     def test_process_documents_unchanged_document(
         self,
         mock_requests,
         mock_hashlib,
-        mock_exists,
         mock_extractor_class,
         mock_storage_class,
     ):
         """Test process_documents skips unchanged document."""
         from discoverer import MARPDocumentDiscoverer
 
+        mock_session = mock_requests.Session.return_value
+
         with tempfile.TemporaryDirectory() as tmpdir:
             # Mock storage with existing document
             mock_storage = Mock()
             mock_storage.index = {
                 "existingid": {
                     "url": "https://test.com/existing-doc.pdf",
-                    "hash": "samehash456",
+                    "hash": "2024-01-01",
+                    "checked_at": 0,
                 }
             }
             mock_storage.base_path = tmpdir
@@ -258,7 +293,7 @@ class TestMARPDocumentDiscoverer:
             mock_extractor_class.return_value = Mock()
 
             # Mock file exists
-            mock_exists.return_value = True
+            mock_storage.existing_pdf_ids.return_value = {"existingid"}
 
             # Mock hash computation returns same hash
             def sha256_side_effect(data):
@@ -273,36 +308,276 @@ class TestMARPDocumentDiscoverer:
 
             mock_hashlib.sha256.side_effect = sha256_side_effect
 
-            mock_head_response = Mock()
-            mock_head_response.headers = {"last-modified": "2024-01-01"}
-            mock_head_response.raise_for_status = Mock()
-            mock_requests.head.return_value = mock_head_response
+            mock_get_response = Mock(status_code=200)
+            mock_get_response.headers = {"last-modified": "2024-01-01"}
+            mock_session.get.return_value = mock_get_response
             mock_requests.RequestException = requests.RequestException
 
             discoverer = MARPDocumentDiscoverer(storage_dir=tmpdir)
 
             urls = ["https://test.com/existing-doc.pdf"]
-            discoverer.process_documents(urls, correlation_id="corr-unchanged")
+            list(discoverer.process_documents(urls, correlation_id="corr-unchanged"))
+
+        # Should not store since document unchanged, nor read the body
+        mock_storage.store_document_stream.assert_not_called()
+        mock_get_response.iter_content.assert_not_called()
+        mock_session.head.assert_not_called()
 
-        # Should not store since document unchanged
-        mock_storage.store_document.assert_not_called()
+    @patch("discoverer.DocumentStorage")
+    @patch("discoverer.PDFLinkExtractor")
+    @patch("discoverer.requests")
+    def test_process_documents_matching_etag_skips_download(
+        self, mock_requests, mock_extractor_class, mock_storage_class
+    ):
+        """Test a stored ETag that still matches costs one GET, body unread."""
+        from discoverer import MARPDocumentDiscoverer, document_id_for_url
+
+        mock_session = mock_requests.Session.return_value
+
+        url = "https://test.com/etag-doc.pdf"
+        doc_id = document_id_for_url(url)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            mock_storage = Mock()
+            mock_storage.index = {
+                doc_id: {"url": url, "hash": "old", "etag": '"v1"', "checked_at": 0}
+            }
+            mock_storage.existing_pdf_ids.return_value = {doc_id}
+            mock_storage_class.return_value = mock_storage
+            mock_extractor_class.return_value = Mock()
+
+            # The origin ignores If-None-Match and answers 200
+            mock_get_response = Mock(status_code=200)
+            mock_get_response.headers = {
+                "etag": '"v1"',
+                "last-modified": "2024-02-01",
+            }
+            mock_session.get.return_value = mock_get_response
+            mock_requests.RequestException = requests.RequestException
+
+            discoverer = MARPDocumentDiscoverer(storage_dir=tmpdir)
+            events = list(
+                discoverer.process_documents([url], correlation_id="etag-123")
+            )
+
+        assert events == []
+        mock_session.head.assert_not_called()
+        mock_session.get.assert_called_once()
+        mock_get_response.iter_content.assert_not_called()
+        mock_storage.store_document_stream.assert_not_called()
+
+    @patch("discoverer.DocumentStorage")
+    @patch("discoverer.PDFLinkExtractor")
+    @patch("discoverer.requests")
+    def test_process_documents_recently_checked_skips_head(
+        self, mock_requests, mock_extractor_class, mock_storage_class
+    ):
+        """Test a PDF checked within CHECK_STALENESS needs no request at all."""
+        import time
+
+        from discoverer import (
+            CHECK_STALENESS,
+            MARPDocumentDiscoverer,
+            document_id_for_url,
+        )
+
+        mock_session = mock_requests.Session.return_value
+
+        fresh_url = "https://test.com/fresh.pdf"
+        stale_url = "https://test.com/stale.pdf"
+        fresh_id = document_id_for_url(fresh_url)
+        stale_id = document_id_for_url(stale_url)
+        now = time.time()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            mock_storage = Mock()
+            mock_storage.index = {
+                fresh_id: {"url": fresh_url, "etag": '"f"', "checked_at": now},
+                stale_id: {
+                    "url": stale_url,
+                    "etag": '"s"',
+                    "checked_at": now - CHECK_STALENESS - 1,
+                },
+            }
+            mock_storage.existing_pdf_ids.return_value = {fresh_id, stale_id}
+            mock_storage_class.return_value = mock_storage
+            mock_extractor_class.return_value = Mock()
+
+            mock_session.get.return_value = Mock(status_code=304, headers={})
+
+            discoverer = MARPDocumentDiscoverer(storage_dir=tmpdir)
+            events = list(
+                discoverer.process_documents(
+                    [fresh_url, stale_url], correlation_id="stale-123"
+                )
+            )
+
+        assert events == []
+        mock_session.get.assert_called_once()
+        assert mock_session.get.call_args[0][0] == stale_url
+        update_call = mock_storage.update_document.call_args
+        assert update_call[0][0] == stale_id
+        assert update_call[0][1]["checked_at"] >= now
+
+    @patch("discoverer.DocumentStorage")
+    @patch("discoverer.PDFLinkExtractor")
+    @patch("discoverer.requests")
+    def test_process_documents_uses_file_mtime_without_checked_at(
+        self, mock_requests, mock_extractor_class, mock_storage_class
+    ):
+        """Test an entry without checked_at is fresh if its PDF was just written."""
+        import os
+
+        from discoverer import MARPDocumentDiscoverer, document_id_for_url
+
+        mock_session = mock_requests.Session.return_value
+
+        url = "https://test.com/mtime.pdf"
+        doc_id = document_id_for_url(url)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            pdf_path = os.path.join(tmpdir, f"{doc_id}.pdf")
+            with open(pdf_path, "wb") as f:
+                f.write(b"%PDF")
+
+            mock_storage = Mock()
+            mock_storage.index = {doc_id: {"url": url, "hash": '"v1"'}}
+            mock_storage.existing_pdf_ids.return_value = {doc_id}
+            mock_storage.pdf_path_for.return_value = pdf_path
+            mock_storage_class.return_value = mock_storage
+            mock_extractor_class.return_value = Mock()
+
+            discoverer = MARPDocumentDiscoverer(storage_dir=tmpdir)
+            events = list(
+                discoverer.process_documents([url], correlation_id="mtime-123")
+            )
+
+        assert events == []
+        mock_session.get.assert_not_called()
+
+    @patch("discoverer.DocumentStorage")
+    @patch("discoverer.PDFLinkExtractor")
+    @patch("discoverer.requests")
+    def test_process_documents_conditional_get_not_modified(
+        self, mock_requests, mock_extractor_class, mock_storage_class
+    ):
+        """Test a 304 on the conditional GET skips the body and marks it checked."""
+        from discoverer import MARPDocumentDiscoverer, document_id_for_url
+
+        mock_session = mock_requests.Session.return_value
+
+        url = "https://test.com/cond-doc.pdf"
+        doc_id = document_id_for_url(url)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            mock_storage = Mock()
+            mock_storage.index = {
+                doc_id: {
+                    "url": url,
+                    "hash": "old",
+                    "etag": '"v1"',
+                    "checked_at": 0,
+                    "last_modified": "2024-01-01",
+                }
+            }
+            mock_storage.existing_pdf_ids.return_value = {doc_id}
+            mock_storage_class.return_value = mock_storage
+            mock_extractor_class.return_value = Mock()
+
+            mock_session.get.return_value = Mock(
+                status_code=304, headers={"etag": '"v1"'}
+            )
+
+            discoverer = MARPDocumentDiscoverer(storage_dir=tmpdir)
+            events = list(
+                discoverer.process_documents([url], correlation_id="cond-123")
+            )
+
+        assert events == []
+        assert mock_session.get.call_args[1]["headers"] == {
+            "If-None-Match": '"v1"',
+            "If-Modified-Since": "2024-01-01",
+        }
+        mock_session.head.assert_not_called()
+        mock_storage.store_document_stream.assert_not_called()
+        update_call = mock_storage.update_document.call_args
+        assert update_call[0][0] == doc_id
+        assert set(update_call[0][1]) == {"checked_at", "hash"}
+        assert update_call[0][1]["hash"] == '"v1"'
+
+    @patch("discoverer.DocumentStorage")
+    @patch("discoverer.PDFLinkExtractor")
+    @patch("discoverer.requests")
+    def test_process_documents_rechecks_legacy_hash(
+        self, mock_requests, mock_extractor_class, mock_storage_class
+    ):
+        """Test a legacy SHA-256 entry is re-checked without emitting an event.
+
+        Legacy entries carry no validators, so the GET is unconditional and
+        the body is downloaded; its hash matches the PDF already on disk.
+        """
+        import time
+
+        from discoverer import MARPDocumentDiscoverer, document_id_for_url
+
+        mock_session = mock_requests.Session.return_value
+
+        url = "https://test.com/legacy.pdf"
+        doc_id = document_id_for_url(url)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            mock_storage = Mock()
+            mock_storage.index = {
+                doc_id: {"url": url, "hash": "a" * 64, "checked_at": time.time()}
+            }
+            mock_storage.existing_pdf_ids.return_value = {doc_id}
+            mock_storage.pdf_content_hash.return_value = "same-bytes"
+
+            def store(document_id, chunks, metadata, **kwargs):
+                list(chunks)
+                mock_storage.index[document_id] = {
+                    **metadata,
+                    "content_hash": "same-bytes",
+                }
+                return True
+
+            mock_storage.store_document_stream.side_effect = store
+            mock_storage_class.return_value = mock_storage
+            mock_extractor_class.return_value = Mock()
+
+            mock_get_response = Mock(
+                status_code=200, headers={"last-modified": "2024-01-01"}
+            )
+            mock_get_response.iter_content.return_value = iter([b"content"])
+            mock_session.get.return_value = mock_get_response
+
+            discoverer = MARPDocumentDiscoverer(storage_dir=tmpdir)
+            events = list(
+                discoverer.process_documents([url], correlation_id="legacy-123")
+            )
+
+        assert events == []
+        mock_session.get.assert_called_once()
+        assert mock_session.get.call_args.kwargs["headers"] is None
+        mock_storage.pdf_content_hash.assert_called_once_with(doc_id)
+        assert mock_storage.index[doc_id]["hash"] == "2024-01-01"
 
     @patch("discoverer.DocumentStorage")
     @patch("discoverer.PDFLinkExtractor")
-    @patch("discoverer.os.path.exists")
     @patch("discoverer.hashlib")
     @patch("discoverer.requests")
     def test_process_documents_updated_document(
         self,
         mock_requests,
         mock_hashlib,
-        mock_exists,
         mock_extractor_class,
         mock_storage_class,
     ):
         """Test process_documents handles updated document with different hash."""
         from discoverer import MARPDocumentDiscoverer
 
+        mock_session = mock_requests.Session.return_value
+
         with tempfile.TemporaryDirectory() as tmpdir:
             # Mock storage with existing document
             mock_storage = Mock()
@@ -310,13 +585,14 @@ class TestMARPDocumentDiscoverer:
                 "updatedid": {
                     "url": "https://test.com/updated-doc.pdf",
                     "hash": "oldhash789",
+                    "checked_at": 0,
                 }
             }
             mock_storage.base_path = tmpdir
             mock_storage_class.return_value = mock_storage
             mock_extractor_class.return_value = Mock()
 
-            mock_exists.return_value = True
+            mock_storage.existing_pdf_ids.return_value = {"updatedid"}
 
             # Mock different hash
             def sha256_side_effect(data):
@@ -331,42 +607,38 @@ class TestMARPDocumentDiscoverer:
 
             mock_hashlib.sha256.side_effect = sha256_side_effect
 
-            mock_head_response = Mock()
-            mock_head_response.headers = {"last-modified": "2024-02-01"}
-            mock_head_response.raise_for_status = Mock()
-
-            mock_get_response = Mock()
-            mock_get_response.content = b"updated content"
+            mock_get_response = Mock(status_code=200)
+            mock_get_response.headers = {"last-modified": "2024-02-01"}
+            mock_get_response.iter_content.return_value = iter([b"updated content"])
             mock_get_response.raise_for_status = Mock()
 
-            mock_requests.head.return_value = mock_head_response
-            mock_requests.get.return_value = mock_get_response
+            mock_session.get.return_value = mock_get_response
             mock_requests.RequestException = requests.RequestException
 
             discoverer = MARPDocumentDiscoverer(storage_dir=tmpdir)
 
             urls = ["https://test.com/updated-doc.pdf"]
-            discoverer.process_documents(urls, correlation_id="update-123")
+            list(discoverer.process_documents(urls, correlation_id="update-123"))
 
         # Should store updated document
-        mock_storage.store_document.assert_called_once()
+        mock_storage.store_document_stream.assert_called_once()
 
     @patch("discoverer.DocumentStorage")
     @patch("discoverer.PDFLinkExtractor")
-    @patch("discoverer.os.path.exists")
     @patch("discoverer.hashlib")
     @patch("discoverer.requests")
     def test_process_documents_download_failure(
         self,
         mock_requests,
         mock_hashlib,
-        mock_exists,
         mock_extractor_class,
         mock_storage_class,
     ):
         """Test process_documents handles PDF download failure."""
         from discoverer import MARPDocumentDiscoverer
 
+        mock_session = mock_requests.Session.return_value
+
         with tempfile.TemporaryDirectory() as tmpdir:
             mock_storage = Mock()
             mock_storage.index = {}
@@ -374,7 +646,7 @@ class TestMARPDocumentDiscoverer:
             mock_storage_class.return_value = mock_storage
             mock_extractor_class.return_value = Mock()
 
-            mock_exists.return_value = False
+            mock_storage.existing_pdf_ids.return_value = set()
 
             # Hash generation succeeds
             mock_hash = Mock()
@@ -385,34 +657,34 @@ class TestMARPDocumentDiscoverer:
             mock_head_response = Mock()
             mock_head_response.headers = {"last-modified": "2024-01-01"}
             mock_head_response.raise_for_status = Mock()
-            mock_requests.head.return_value = mock_head_response
-            mock_requests.get.side_effect = Exception("Download failed")
+            mock_session.head.return_value = mock_head_response
+            mock_session.get.side_effect = Exception("Download failed")
             mock_requests.RequestException = requests.RequestException
 
             discoverer = MARPDocumentDiscoverer(storage_dir=tmpdir)
 
             urls = ["https://test.com/broken.pdf"]
-            discoverer.process_documents(urls, correlation_id="fail-123")
+            list(discoverer.process_documents(urls, correlation_id="fail-123"))
 
         # Should not store or publish
-        mock_storage.store_document.assert_not_called()
+        mock_storage.store_document_stream.assert_not_called()
 
     @patch("discoverer.DocumentStorage")
     @patch("discoverer.PDFLinkExtractor")
-    @patch("discoverer.os.path.exists")
     @patch("discoverer.hashlib")
     @patch("discoverer.requests")
     def test_process_documents_multiple_urls(
         self,
         mock_requests,
         mock_hashlib,
-        mock_exists,
         mock_extractor_class,
         mock_storage_class,
     ):
         """Test process_documents handles multiple URLs."""
         from discoverer import MARPDocumentDiscoverer
 
+        mock_session = mock_requests.Session.return_value
+
         with tempfile.TemporaryDirectory() as tmpdir:
             mock_storage = Mock()
             mock_storage.index = {}
@@ -420,7 +692,7 @@ class TestMARPDocumentDiscoverer:
             mock_storage_class.return_value = mock_storage
             mock_extractor_class.return_value = Mock()
 
-            mock_exists.return_value = False
+            mock_storage.existing_pdf_ids.return_value = set()
 
             # Mock hash - need 2 hashes per URL (doc_id + content hash)
             mock_hash = Mock()
@@ -438,12 +710,13 @@ class TestMARPDocumentDiscoverer:
             mock_head_response = Mock()
             mock_head_response.headers = {"last-modified": "2024-01-01"}
             mock_head_response.raise_for_status = Mock()
-            mock_requests.head.return_value = mock_head_response
+            mock_session.head.return_value = mock_head_response
 
             mock_get_response = Mock()
-            mock_get_response.content = b"content"
+            mock_get_response.headers = {}
+            mock_get_response.iter_content.return_value = iter([b"content"])
             mock_get_response.raise_for_status = Mock()
-            mock_requests.get.return_value = mock_get_response
+            mock_session.get.return_value = mock_get_response
             mock_requests.RequestException = requests.RequestException
 
             discoverer = MARPDocumentDiscoverer(storage_dir=tmpdir)
@@ -454,27 +727,146 @@ class TestMARPDocumentDiscoverer:
                 "https://test.com/doc3.pdf",
             ]
 
-            discoverer.process_documents(urls, correlation_id="multi-123")
+            list(discoverer.process_documents(urls, correlation_id="multi-123"))
 
         # Should process all URLs
-        assert mock_storage.store_document.call_count == 3
+        assert mock_storage.store_document_stream.call_count == 3
+
+    @patch("discoverer.DocumentStorage")
+    @patch("discoverer.PDFLinkExtractor")
+    @patch("discoverer.DocumentDiscovered")
+    @patch("discoverer.requests")
+    def test_process_documents_preserves_url_order(
+        self, mock_requests, mock_event_class, mock_extractor_class, mock_storage_class
+    ):
+        """Test concurrent processing still returns events in URL order."""
+        from discoverer import MARPDocumentDiscoverer
+
+        mock_session = mock_requests.Session.return_value
+        # Each event is the keyword arguments it was built from
+        mock_event_class.side_effect = lambda **kwargs: kwargs
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            mock_storage = Mock()
+            mock_storage.index = {}
+            mock_storage.existing_pdf_ids.return_value = set()
+            mock_storage_class.return_value = mock_storage
+            mock_extractor_class.return_value = Mock()
+
+            mock_head_response = Mock()
+            mock_head_response.headers = {"last-modified": "2024-01-01"}
+            mock_session.head.return_value = mock_head_response
+
+            mock_get_response = Mock()
+            mock_get_response.headers = {}
+            mock_get_response.iter_content.return_value = iter([b"content"])
+            mock_session.get.return_value = mock_get_response
+            mock_requests.RequestException = requests.RequestException
+
+            discoverer = MARPDocumentDiscoverer(storage_dir=tmpdir)
+
+            urls = [f"https://test.com/doc{i}.pdf" for i in range(20)]
+            events = list(
+                discoverer.process_documents(urls, correlation_id="order-123")
+            )
+
+        assert [event["payload"]["sourceUrl"] for event in events] == urls
+
+    @patch("discoverer.DocumentStorage")
+    @patch("discoverer.PDFLinkExtractor")
+    @patch("discoverer.requests")
+    def test_process_documents_skips_duplicate_urls(
+        self, mock_requests, mock_extractor_class, mock_storage_class
+    ):
+        """Test a URL listed twice is downloaded and reported once."""
+        from discoverer import MARPDocumentDiscoverer
+
+        mock_session = mock_requests.Session.return_value
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            mock_storage = Mock()
+            mock_storage.index = {}
+            mock_storage.existing_pdf_ids.return_value = set()
+            mock_storage_class.return_value = mock_storage
+            mock_extractor_class.return_value = Mock()
+
+            mock_get_response = Mock(status_code=200, headers={})
+            mock_get_response.iter_content.return_value = iter([b"content"])
+            mock_session.get.return_value = mock_get_response
+
+            discoverer = MARPDocumentDiscoverer(storage_dir=tmpdir)
+            url = "https://test.com/dup.pdf"
+            events = list(
+                discoverer.process_documents([url, url], correlation_id="dup-123")
+            )
+
+        assert len(events) == 1
+        mock_session.get.assert_called_once()
+
+    @patch("discoverer.DocumentStorage")
+    @patch("discoverer.PDFLinkExtractor")
+    @patch("discoverer.DocumentDiscovered")
+    @patch("discoverer.requests")
+    def test_process_documents_starts_unheld_urls_first(
+        self, mock_requests, mock_event_class, mock_extractor_class, mock_storage_class
+    ):
+        """Test URLs without a stored PDF are processed before held ones."""
+        from discoverer import MARPDocumentDiscoverer, document_id_for_url
+
+        mock_session = mock_requests.Session.return_value
+        mock_event_class.side_effect = lambda **kwargs: kwargs
+        held_url = "https://test.com/held.pdf"
+        new_url = "https://test.com/new.pdf"
+        held_id = document_id_for_url(held_url)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            mock_storage = Mock()
+            mock_storage.index = {
+                held_id: {"url": held_url, "hash": "h", "checked_at": 0}
+            }
+            mock_storage.existing_pdf_ids.return_value = {held_id}
+            mock_storage_class.return_value = mock_storage
+            mock_extractor_class.return_value = Mock()
+
+            calls = []
+            mock_session.head.side_effect = lambda url, **kw: (
+                calls.append(url) or Mock(headers={"etag": '"e"'})
+            )
+            mock_session.get.side_effect = lambda url, **kw: (
+                calls.append(url) or Mock(status_code=200, headers={})
+            )
+
+            discoverer = MARPDocumentDiscoverer(storage_dir=tmpdir)
+            # A single worker makes the submission order observable
+            with patch("discoverer.MAX_CONCURRENT_DOWNLOADS", 1):
+                events = list(
+                    discoverer.process_documents(
+                        [held_url, new_url], correlation_id="order-456"
+                    )
+                )
+
+        assert calls[0] == new_url
+        assert [event["payload"]["sourceUrl"] for event in events] == [
+            held_url,
+            new_url,
+        ]
 
     @patch("discoverer.DocumentStorage")
     @patch("discoverer.PDFLinkExtractor")
-    @patch("discoverer.os.path.exists")
     @patch("discoverer.hashlib")
     @patch("discoverer.requests")
     def test_discover_and_process_documents_integration(
         self,
         mock_requests,
         mock_hashlib,
-        mock_exists,
         mock_extractor_class,
         mock_storage_class,
     ):
         """Test discover_and_process_documents combines discovery and processing."""
         from discoverer import MARPDocumentDiscoverer
 
+        mock_session = mock_requests.Session.return_value
+
         with tempfile.TemporaryDirectory() as tmpdir:
             mock_storage = Mock()
             mock_storage.index = {}
@@ -486,7 +878,7 @@ class TestMARPDocumentDiscoverer:
             mock_extractor.get_pdf_urls.return_value = ["https://test.com/doc.pdf"]
             mock_extractor_class.return_value = mock_extractor
 
-            mock_exists.return_value = False
+            mock_storage.existing_pdf_ids.return_value = set()
 
             # Mock hash
             mock_hash = Mock()
@@ -497,6 +889,7 @@ class TestMARPDocumentDiscoverer:
             mock_page_response = Mock()
             mock_page_response.text = "<html>page</html>"
             mock_page_response.status_code = 200
+            mock_page_response.headers = {}
             mock_page_response.raise_for_status = Mock()
 
             # Mock PDF head response
@@ -506,7 +899,8 @@ class TestMARPDocumentDiscoverer:
 
             # Mock PDF get response
             mock_get_response = Mock()
-            mock_get_response.content = b"pdf"
+            mock_get_response.headers = {}
+            mock_get_response.iter_content.return_value = iter([b"pdf"])
             mock_get_response.raise_for_status = Mock()
 
             def request_side_effect(url, *args, **kwargs):
@@ -514,13 +908,17 @@ class TestMARPDocumentDiscoverer:
                     return mock_get_response
                 return mock_page_response
 
-            mock_requests.get.side_effect = request_side_effect
-            mock_requests.head.return_value = mock_head_response
+            mock_session.get.side_effect = request_side_effect
+            mock_session.head.return_value = mock_head_response
             mock_requests.RequestException = requests.RequestException
 
             discoverer = MARPDocumentDiscoverer(storage_dir=tmpdir)
 
-            discoverer.discover_and_process_documents(correlation_id="integration-123")
+            list(
+                discoverer.discover_and_process_documents(
+                    correlation_id="integration-123"
+                )
+            )
 
         # Should have discovered and processed
-        assert mock_storage.store_document.call_count >= 1
+        assert mock_storage.store_document_stream.call_count >= 1
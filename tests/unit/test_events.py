@@ -48,6 +48,59 @@ class TestEventPublishing:
         assert payload["topScore"] == 0.95
         assert payload["latencyMs"] == 100.5
 
+    @patch("services.retrieval.app.retrieval_events.pika.BlockingConnection")
+    def test_retrieval_completed_reuses_connection(self, mock_connection):
+        """Test consecutive RetrievalCompleted events share one connection."""
+        from services.retrieval.app import retrieval_events
+
+        mock_conn = mock_connection.return_value
+        mock_conn.is_closed = False
+
+        for query_id in ("q-1", "q-2"):
+            retrieval_events.publish_retrieval_completed_event(
+                query_id=query_id,
+                query="test query",
+                results_count=1,
+                top_score=0.5,
+                latency_ms=1.0,
+            )
+        retrieval_events.close_publisher()
+
+        assert mock_connection.call_count == 1
+        assert mock_conn.channel.return_value.basic_publish.call_count == 2
+        # The reused connection is pumped so idle heartbeats are answered
+        mock_conn.process_data_events.assert_called_once()
+        mock_conn.close.assert_called_once()
+
+    @patch("services.retrieval.app.retrieval_events.pika.BlockingConnection")
+    def test_retrieval_completed_reconnects_dropped_connection(self, mock_connection):
+        """Test a shared connection the broker dropped is replaced."""
+        from services.retrieval.app import retrieval_events
+
+        # Other test modules may replace pika with a Mock, so use a real
+        # exception class for the broker error.
+        class StreamLost(Exception):
+            pass
+
+        stale, fresh = MagicMock(is_closed=False), MagicMock(is_closed=False)
+        stale.process_data_events.side_effect = StreamLost("heartbeat")
+        mock_connection.side_effect = [stale, fresh]
+
+        with patch.object(retrieval_events, "AMQPError", StreamLost):
+            for query_id in ("q-1", "q-2"):
+                retrieval_events.publish_retrieval_completed_event(
+                    query_id=query_id,
+                    query="test query",
+                    results_count=1,
+                    top_score=0.5,
+                    latency_ms=1.0,
+                )
+            retrieval_events.close_publisher()
+
+        assert mock_connection.call_count == 2
+        stale.channel.return_value.basic_publish.assert_called_once()
+        fresh.channel.return_value.basic_publish.assert_called_once()
+
     @patch("services.chat.app.events.pika.BlockingConnection")
     def test_publish_query_received_event(self, mock_connection):
         """Test publishing QueryReceived event."""
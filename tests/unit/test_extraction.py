@@ -9,7 +9,7 @@ Target: services/extraction/app/extractor.py
 
 import sys
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock, PropertyMock, patch
 
 import pytest
 from pypdf import PdfWriter
@@ -215,6 +215,23 @@ class TestTextExtraction:
         assert len(result["page_texts"]) == 3
         assert result["metadata"]["pageCount"] == 3
 
+    def test_extract_document_parses_pdf_once(self, tmp_path):
+        """Test metadata comes from the open pdfplumber document, not pypdf."""
+        pdf_path = tmp_path / "test.pdf"
+        writer = PdfWriter()
+        writer.add_blank_page(width=72, height=72)
+        writer.add_metadata({"/Title": "Assessment Regulations"})
+        with open(pdf_path, "wb") as f:
+            writer.write(f)
+
+        extractor = PDFExtractor()
+        with patch("services.extraction.app.extractor.pypdf.PdfReader") as reader:
+            result = extractor.extract_document(str(pdf_path), "http://test.com")
+
+        reader.assert_not_called()
+        assert result["metadata"]["title"] == "Assessment Regulations"
+        assert result["metadata"]["pageCount"] == 1
+
 
 # ============================================================================
 # TEXT CLEANING TESTS
@@ -322,6 +339,34 @@ class TestErrorHandling:
             assert "sourceUrl" in metadata
             assert metadata["pageCount"] == 0
 
+    def test_open_document_metadata_graceful_degradation(self, tmp_path):
+        """Test a broken Info dictionary on an open document yields fallbacks."""
+        pdf = MagicMock()
+        type(pdf).metadata = PropertyMock(side_effect=ValueError("bad /Info"))
+
+        extractor = PDFExtractor()
+        metadata = extractor._extract_metadata(
+            str(tmp_path / "broken.pdf"), "http://test.com", pdf
+        )
+
+        assert metadata == {
+            "title": "broken.pdf",
+            "pageCount": 0,
+            "sourceUrl": "http://test.com",
+        }
+
+    def test_open_document_metadata_without_title(self, tmp_path):
+        """Test a missing Title falls back to the filename, as with pypdf."""
+        pdf = MagicMock(metadata=None, pages=[object(), object()])
+
+        extractor = PDFExtractor()
+        metadata = extractor._extract_metadata(
+            str(tmp_path / "untitled.pdf"), "http://test.com", pdf
+        )
+
+        assert metadata["title"] == "untitled.pdf"
+        assert metadata["pageCount"] == 2
+
     def test_check_file_type_handles_errors(self, tmp_path):
         """Test file type checking handles errors gracefully."""
         extractor = PDFExtractor()
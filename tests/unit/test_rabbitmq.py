@@ -6,10 +6,18 @@ from test_ingestion_flow.py
 """
 
 import json
-from unittest.mock import MagicMock
+import sys
+import threading
+from pathlib import Path
+from unittest.mock import MagicMock, patch
 
 import pytest
 
+# The publisher imports its sibling modules flat, as in the Docker image
+ingestion_app = Path(__file__).parent.parent.parent / "services" / "ingestion" / "app"
+if str(ingestion_app) not in sys.path:
+    sys.path.insert(0, str(ingestion_app))
+
 # --- Fake RabbitMQ for Testing ---
 
 
@@ -345,3 +353,66 @@ class TestRabbitMQEdgeCases:
         assert result is True
         assert len(fake_publisher.published_events) == 1
         assert len(fake_publisher.published_events[0]["data"]["items"]) == 100
+
+
+class TestEventPublisherRetryDelay:
+    """Test the real EventPublisher backoff formula."""
+
+    def test_retry_delay_uses_full_jitter(self):
+        """Test each wait is drawn from [0, capped exponential]."""
+        from services.ingestion.app import rabbitmq
+
+        publisher = rabbitmq.EventPublisher(host="localhost")
+
+        with patch.object(rabbitmq._random, "uniform", return_value=0.25) as uniform:
+            for attempt in range(10):
+                assert publisher._calculate_retry_delay(attempt) == 0.25
+                uniform.assert_called_with(
+                    0,
+                    min(
+                        rabbitmq.INITIAL_RETRY_DELAY * 2**attempt,
+                        rabbitmq.MAX_RETRY_DELAY,
+                    ),
+                )
+
+
+class TestEventPublisherHealthProbe:
+    """Test the publisher's connectivity check used by /health."""
+
+    def test_is_connected_does_not_wait_for_a_publish(self):
+        """Test a held lock reports the open flag instead of blocking."""
+        from services.ingestion.app import rabbitmq
+
+        publisher = rabbitmq.EventPublisher(host="localhost")
+        publisher.connection = MagicMock(is_open=True)
+        publisher._ensure_connection = MagicMock(return_value=False)
+        publishing = threading.Event()
+        done = threading.Event()
+
+        def hold_lock():
+            with publisher._lock:
+                publishing.set()
+                done.wait(5)
+
+        holder = threading.Thread(target=hold_lock)
+        holder.start()
+        publishing.wait(5)
+        try:
+            assert publisher.is_connected() is True
+            publisher.connection = None
+            assert publisher.is_connected() is False
+        finally:
+            done.set()
+            holder.join()
+
+        publisher._ensure_connection.assert_not_called()
+
+    def test_is_connected_checks_the_connection_when_idle(self):
+        """Test an idle publisher checks and re-establishes its connection."""
+        from services.ingestion.app import rabbitmq
+
+        publisher = rabbitmq.EventPublisher(host="localhost")
+        publisher._ensure_connection = MagicMock(return_value=True)
+
+        assert publisher.is_connected() is True
+        publisher._ensure_connection.assert_called_once()
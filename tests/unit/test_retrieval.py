@@ -900,3 +900,100 @@ class TestEventConsumer:
         mock_channel.stop_consuming.assert_called_once()
         # But should not try to close already closed connection
         mock_connection.close.assert_not_called()
+
+
+# ============================================================================
+# RABBITMQ CONSUMER TESTS - ChunksIndexed batched acks (consumers.py)
+# ============================================================================
+
+
+class TestChunksIndexedAcks:
+    """Test ChunksIndexed deliveries are acknowledged in ranges."""
+
+    def _start_consumer(self):
+        """Run the consumer against a fake channel and return its callback."""
+        from services.retrieval.app import consumers
+
+        connection = Mock()
+        channel = connection.channel.return_value
+        with patch.object(
+            consumers.pika, "BlockingConnection", return_value=connection
+        ):
+            consumers.consume_chunks_indexed_events()
+        callback = channel.basic_consume.call_args.kwargs["on_message_callback"]
+        return connection, channel, callback
+
+    @staticmethod
+    def _deliver(callback, channel, tag, chunk_index, total_chunks, body=None):
+        method = Mock(delivery_tag=tag)
+        if body is None:
+            body = json.dumps(
+                {
+                    "eventType": "ChunksIndexed",
+                    "payload": {
+                        "documentId": "doc-1",
+                        "chunkIndex": chunk_index,
+                        "totalChunks": total_chunks,
+                    },
+                }
+            )
+        callback(channel, method, None, body)
+
+    def test_final_chunk_flushes_range_ack(self):
+        """Test a document's final chunk acknowledges all its deliveries at once."""
+        connection, channel, callback = self._start_consumer()
+
+        for tag in range(1, 4):
+            self._deliver(callback, channel, tag, tag - 1, 3)
+
+        channel.basic_ack.assert_called_once_with(delivery_tag=3, multiple=True)
+        connection.remove_timeout.assert_called_once()
+
+    def test_flushes_at_batch_size(self):
+        """Test ACK_BATCH_SIZE deliveries are acknowledged without a final chunk."""
+        from services.retrieval.app import consumers
+
+        _, channel, callback = self._start_consumer()
+        total = consumers.ACK_BATCH_SIZE + 10
+
+        for tag in range(1, consumers.ACK_BATCH_SIZE + 1):
+            self._deliver(callback, channel, tag, tag - 1, total)
+
+        channel.basic_ack.assert_called_once_with(
+            delivery_tag=consumers.ACK_BATCH_SIZE, multiple=True
+        )
+
+    def test_flushes_pending_acks_before_nack(self):
+        """Test a rejected delivery is never settled by a later range ack."""
+        _, channel, callback = self._start_consumer()
+        calls = Mock()
+        channel.basic_ack.side_effect = lambda **kw: calls.ack(**kw)
+        channel.basic_nack.side_effect = lambda **kw: calls.nack(**kw)
+
+        self._deliver(callback, channel, 1, 0, 5)
+        self._deliver(callback, channel, 2, 1, 5)
+        # A payload that is not an object makes the handler fail
+        bad_body = json.dumps({"eventType": "ChunksIndexed", "payload": "oops"})
+        self._deliver(callback, channel, 3, 0, 0, body=bad_body)
+
+        assert [c[0] for c in calls.mock_calls] == ["ack", "nack"]
+        channel.basic_ack.assert_called_once_with(delivery_tag=2, multiple=True)
+        channel.basic_nack.assert_called_once_with(delivery_tag=3, requeue=False)
+
+    def test_timer_flushes_idle_partial_batch(self):
+        """Test a partial batch is acknowledged when its flush timer fires."""
+        from services.retrieval.app import consumers
+
+        connection, channel, callback = self._start_consumer()
+
+        self._deliver(callback, channel, 1, 0, 5)
+        self._deliver(callback, channel, 2, 1, 5)
+
+        channel.basic_ack.assert_not_called()
+        connection.call_later.assert_called_once()
+        delay, flush = connection.call_later.call_args.args
+        assert delay == consumers.ACK_FLUSH_INTERVAL
+
+        flush()
+
+        channel.basic_ack.assert_called_once_with(delivery_tag=2, multiple=True)
@@ -5,10 +5,12 @@ Target: services/ingestion/app/storage.py
 Coverage: 94 statements at 0%
 """
 
+import hashlib
 import json
 import os
 import shutil
 import tempfile
+import threading
 from unittest.mock import patch
 
 
@@ -64,6 +66,31 @@ class TestDocumentStorage:
 
             assert storage.index == {}
 
+    def test_index_not_reparsed_when_unchanged(self):
+        """Test reads reuse the in-memory index until the file changes."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            from services.ingestion.app import storage as storage_module
+
+            storage = storage_module.DocumentStorage(tmpdir)
+            storage.store_document("doc1", b"content", {"url": "test"})
+
+            with patch.object(
+                storage_module.orjson, "loads", wraps=storage_module.orjson.loads
+            ) as mock_load:
+                storage.list_documents()
+                storage.get_pdf("doc1")
+                assert mock_load.call_count == 0
+
+                # Another writer replaces the index file
+                other = storage_module.DocumentStorage(tmpdir)
+                other.store_document("doc2", b"other", {"url": "test2"})
+
+                assert {d["document_id"] for d in storage.list_documents()} == {
+                    "doc1",
+                    "doc2",
+                }
+                assert mock_load.call_count == 2
+
     def test_store_document_success(self):
         """Test storing document PDF and metadata."""
         with tempfile.TemporaryDirectory() as tmpdir:
@@ -91,6 +118,39 @@ class TestDocumentStorage:
             with open(pdf_path, "rb") as f:
                 assert f.read() == pdf_content
 
+    def test_store_document_drops_pdf_from_page_cache(self):
+        """Test store_document preallocates the PDF and evicts it from cache."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            from services.ingestion.app import storage as storage_module
+
+            storage = storage_module.DocumentStorage(tmpdir)
+            pdf_content = b"fake pdf content"
+
+            with (
+                patch.object(storage_module, "_preallocate") as mock_preallocate,
+                patch.object(storage_module, "_drop_page_cache") as mock_drop,
+            ):
+                result = storage.store_document("doc1", pdf_content, {"url": "u"})
+
+            assert result is True
+            assert mock_preallocate.call_args[0][1] == len(pdf_content)
+            mock_drop.assert_called_once()
+
+    def test_store_document_syncs_only_when_enabled(self):
+        """Test PDFs are flushed to disk only with SYNC_PDFS set."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            from services.ingestion.app import storage as storage_module
+
+            storage = storage_module.DocumentStorage(tmpdir)
+
+            with patch.object(storage_module.os, "fsync") as mock_fsync:
+                storage.store_document("doc1", b"first", {"url": "u"})
+                mock_fsync.assert_not_called()
+
+                with patch.object(storage_module, "SYNC_PDFS", True):
+                    storage.store_document("doc2", b"second", {"url": "u"})
+                mock_fsync.assert_called_once()
+
     def test_store_document_creates_directory_if_deleted(self):
         """Test store_document recreates pdfs directory if it was deleted."""
         with tempfile.TemporaryDirectory() as tmpdir:
@@ -132,6 +192,141 @@ class TestDocumentStorage:
                 result = storage.store_document("doc1", b"content", {"url": "test"})
                 assert result is False
 
+    def test_store_document_stream_writes_chunks(self):
+        """Test store_document_stream assembles chunks and trims preallocation."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            from services.ingestion.app.storage import DocumentStorage
+
+            storage = DocumentStorage(tmpdir)
+            result = storage.store_document_stream(
+                "doc1", [b"%PDF", b"-1.4"], {"url": "test"}, expected_size=64
+            )
+
+            assert result is True
+            with open(os.path.join(storage.pdfs_path, "doc1.pdf"), "rb") as f:
+                assert f.read() == b"%PDF-1.4"
+            assert os.listdir(storage.pdfs_path) == ["doc1.pdf"]
+            assert storage.index["doc1"]["content_hash"] == (
+                hashlib.blake2b(b"%PDF-1.4", digest_size=16).hexdigest()
+            )
+
+    def test_store_document_stream_discards_partial_file(self):
+        """Test a failing chunk stream leaves neither PDF nor index entry."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            from services.ingestion.app.storage import DocumentStorage
+
+            storage = DocumentStorage(tmpdir)
+
+            def broken_stream():
+                yield b"%PDF"
+                raise IOError("connection reset")
+
+            result = storage.store_document_stream("doc1", broken_stream(), {})
+
+            assert result is False
+            assert os.listdir(storage.pdfs_path) == []
+            assert "doc1" not in storage.index
+
+    def test_store_document_stream_keeps_identical_pdf(self):
+        """Test re-storing the same bytes leaves the existing PDF in place."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            from services.ingestion.app.storage import DocumentStorage
+
+            storage = DocumentStorage(tmpdir)
+            storage.store_document("doc1", b"%PDF-1.4", {"url": "test"})
+            pdf_path = storage.pdf_path_for("doc1")
+            inode = os.stat(pdf_path).st_ino
+
+            result = storage.store_document_stream(
+                "doc1", iter([b"%PDF", b"-1.4"]), {"url": "test", "etag": '"v2"'}
+            )
+
+            assert result is True
+            assert os.stat(pdf_path).st_ino == inode
+            assert os.listdir(storage.pdfs_path) == ["doc1.pdf"]
+            assert storage.index["doc1"]["etag"] == '"v2"'
+
+    def test_store_document_stream_concurrent_writers(self):
+        """Test two overlapping writes of one document never tear the PDF."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            from services.ingestion.app.storage import DocumentStorage
+
+            storage = DocumentStorage(tmpdir)
+            both_writing = threading.Barrier(2, timeout=5)
+            results = {}
+
+            def write(body):
+                def chunks():
+                    yield body[:4]
+                    both_writing.wait()
+                    yield body[4:]
+
+                results[body] = storage.store_document_stream(
+                    "doc1", chunks(), {"url": "test"}
+                )
+
+            bodies = [b"%PDF-first", b"%PDF-second"]
+            threads = [threading.Thread(target=write, args=(b,)) for b in bodies]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            assert all(results[body] for body in bodies)
+            with open(storage.pdf_path_for("doc1"), "rb") as f:
+                assert f.read() in bodies
+            assert os.listdir(storage.pdfs_path) == ["doc1.pdf"]
+
+    def test_pdf_content_hash_matches_stored_content_hash(self):
+        """Test hashing a PDF on disk gives the content_hash recorded at store."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            from services.ingestion.app.storage import DocumentStorage
+
+            storage = DocumentStorage(tmpdir)
+            storage.store_document("doc1", b"%PDF-1.4", {"url": "test"})
+
+            assert (
+                storage.pdf_content_hash("doc1")
+                == storage.index["doc1"]["content_hash"]
+            )
+            assert storage.pdf_content_hash("missing") is None
+
+    def test_store_document_deferred_index_flush(self):
+        """Test persist_index=False keeps the index in memory until flushed."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            from services.ingestion.app.storage import DocumentStorage
+
+            storage = DocumentStorage(tmpdir)
+            storage.store_document(
+                "doc1", b"content", {"url": "test"}, persist_index=False
+            )
+
+            with open(storage.index_path) as f:
+                assert json.load(f) == {}
+
+            storage.flush_index()
+
+            with open(storage.index_path) as f:
+                assert json.load(f)["doc1"]["url"] == "test"
+            assert not os.path.exists(f"{storage.index_path}.tmp")
+
+    def test_update_document_merges_fields(self):
+        """Test update_document changes index fields and leaves the PDF alone."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            from services.ingestion.app.storage import DocumentStorage
+
+            storage = DocumentStorage(tmpdir)
+            storage.store_document("doc1", b"content", {"url": "test", "hash": "a"})
+
+            assert storage.update_document("doc1", {"hash": "b"}) is True
+            assert storage.update_document("missing", {"hash": "b"}) is False
+
+            with open(storage.index_path) as f:
+                entry = json.load(f)["doc1"]
+            assert entry["hash"] == "b"
+            assert entry["url"] == "test"
+            assert storage.get_pdf("doc1") == b"content"
+
     def test_get_pdf_success(self):
         """Test retrieving PDF content."""
         with tempfile.TemporaryDirectory() as tmpdir:
@@ -187,6 +382,19 @@ class TestDocumentStorage:
             assert os.path.exists(path)
             assert path.endswith("doc1.pdf")
 
+    def test_pdf_path_for_is_absolute_under_base_path(self):
+        """Test pdf_path_for matches where store_document writes the PDF."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            from services.ingestion.app.storage import DocumentStorage
+
+            storage = DocumentStorage(os.path.relpath(tmpdir))
+            storage.store_document("doc1", b"content", {"url": "test"})
+
+            path = storage.pdf_path_for("doc1")
+
+            assert os.path.isabs(path)
+            assert os.path.samefile(path, storage.get_pdf_path("doc1"))
+
     def test_get_pdf_path_not_found(self):
         """Test get_pdf_path returns None for non-existent document."""
         with tempfile.TemporaryDirectory() as tmpdir:
@@ -211,6 +419,21 @@ class TestDocumentStorage:
             assert path is not None
             assert os.path.exists(path)
 
+    def test_existing_pdf_ids(self):
+        """Test existing_pdf_ids lists documents whose PDFs are on disk."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            from services.ingestion.app.storage import DocumentStorage
+
+            storage = DocumentStorage(tmpdir)
+            storage.store_document("doc1", b"content1", {"url": "test1"})
+            storage.store_document("doc2", b"content2", {"url": "test2"})
+            os.remove(os.path.join(storage.pdfs_path, "doc2.pdf"))
+
+            assert storage.existing_pdf_ids() == {"doc1"}
+
+            shutil.rmtree(storage.pdfs_path)
+            assert storage.existing_pdf_ids() == set()
+
     def test_list_documents_empty(self):
         """Test list_documents returns empty list for new storage."""
         with tempfile.TemporaryDirectory() as tmpdir: